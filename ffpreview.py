@@ -19,6 +19,8 @@ _FFPREVIEW_CFG = 'ffpreview.conf'
 
 _FF_DEBUG = False
 
+_PIPE_SIZE = 1 << 20
+
 _FFPREVIEW_HELP = """
 <style>
   td {padding: 0.5em 0em 0em 0.5em;}
@@ -65,76 +67,123 @@ _FFPREVIEW_HELP = """
 
 import sys
 
-_PYTHON_VERSION = float("%d.%d" % (sys.version_info.major, sys.version_info.minor))
-if _PYTHON_VERSION < 3.6:
-    raise Exception ('Need Python version 3.6 or later, got version ' + str(sys.version))
+if sys.version_info < (3, 6):
+    raise RuntimeError('Need Python version 3.6 or later, got version ' + str(sys.version))
+_PYTHON_VERSION = '%d.%d' % sys.version_info[:2]
 
 import platform
 import io
 import os
+import stat
 import signal
 import time
 import re
 import tempfile
 import argparse
 import json
-from configparser import RawConfigParser as ConfigParser
-from subprocess import PIPE, Popen, DEVNULL
+from subprocess import PIPE, Popen, DEVNULL, TimeoutExpired
 import shlex
 import base64
-from copy import deepcopy
-from PyQt5.QtCore import *
-from PyQt5.QtWidgets import *
-from PyQt5.QtGui import *
-from inspect import currentframe
+from functools import lru_cache, partial
+from operator import attrgetter
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from PyQt5.QtCore import (
+    Qt, QObject, QThread, QTimer, QEvent, QEventLoop, QTime, QPoint, QRect, QSize,
+    QAbstractTableModel, QItemSelection, QItemSelectionModel, pyqtSignal, pyqtSlot
+)
+from PyQt5.QtWidgets import (
+    QApplication, QMainWindow, QDialog, QWidget, QLayout, QHBoxLayout,
+    QVBoxLayout, QSizePolicy, QScrollArea, QLabel, QPushButton,
+    QCheckBox, QComboBox, QLineEdit, QSpinBox, QDoubleSpinBox, QTimeEdit,
+    QTextEdit, QProgressBar, QMenu, QAction, QShortcut, QToolTip, QFileDialog,
+    QMessageBox,
+    QAbstractItemView, QHeaderView, QTreeView,
+    QTableWidget, QTableWidgetItem
+)
+from PyQt5.QtGui import (
+    QGuiApplication, QCloseEvent, QBrush, QColor, QIcon, QImage, QPainter, QPixmap,
+    QPixmapCache, QStandardItem
+)
+from PyQt5 import sip
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 ############################################################
 # utility functions
 
+_INT_RE = re.compile(r'^\s*([+-]?\d+)')
+_FLOAT_RE = re.compile(r'^\s*([+-]?([0-9]+([.][0-9]*)?|[.][0-9]+))')
+_CFG_KV_RE = re.compile(r'([^=:]*?)\s*[=:]\s*(.*)')
+_GRID_RE = re.compile(r'[xX,;:]')
+_CFG_KEY_RE = re.compile(r'^\s*([^\s=]+)\s*=')
+_ERRNO_PFX_RE = re.compile(r'^\[.*\]\s*')
+_SUBS_STREAM_RE = re.compile(r'\s*Stream #.*: Subtitle:')
+_FRAME_TIME_RE = re.compile(r'^frame=\s*(\d+).*time=\s*(\d+:\d+:\d+(\.\d+)?)')
+_PTS_TIME_RE = re.compile(rb'pts_time:(\d*\.?\d*)')
+# escape a path for use as filter option value inside a filter graph,
+# i.e. two levels of ffmpeg escaping applied in a single pass
+_FLT_PATH_ESC = str.maketrans({
+    '\\': r'\\\\', ':': r'\\:', "'": r"\\\'",
+    '[': r'\[', ']': r'\]', ',': r'\,', ';': r'\;',
+})
+
 def eprint(lvl, *args, vo=0, **kwargs):
     v = cfg['verbosity'] if 'cfg' in globals() else vo
-    if lvl <= v:
-        print('LINE %d: ' % currentframe().f_back.f_lineno, file=sys.stderr, end = '')
-        print(*args, file=sys.stderr, **kwargs)
+    if lvl > v:
+        return
+    sys.stderr.write('LINE %d: ' % sys._getframe(1).f_lineno)
+    print(*args, file=sys.stderr, **kwargs)
 
 def hms2s(ts):
-    h = 0
-    m = 0
-    s = 0.0
-    t = ts.split(':')
-    for i in range(len(t)):
-        h = m; m = s; s = float(t[i])
-    return float(h * 3600) + m * 60 + s
+    if ':' not in ts:
+        return float(ts)
+    return sum(float(p) * m for p, m in zip(reversed(ts.split(':')), (1, 60, 3600)))
 
 def s2hms(ts, frac=True, zerohours=False):
-    s, ms = divmod(float(ts), 1.0)
+    return _s2hms(int(round(float(ts) * 1000)), frac, zerohours)
+
+@lru_cache(maxsize=4096)
+def _s2hms(ms, frac, zerohours):
+    s, ms = divmod(ms, 1000)
     m, s = divmod(s, 60)
     h, m = divmod(m, 60)
-    res = '' if h < 1 and zerohours == False else '%02d:' % h
-    res += '%02d:%02d' % (m, s)
-    res += '' if not frac else ('%.3f' % ms).lstrip('0')
-    return res
+    if h or zerohours:
+        return '%02d:%02d:%02d.%03d' % (h, m, s, ms) if frac else '%02d:%02d:%02d' % (h, m, s)
+    return '%02d:%02d.%03d' % (m, s, ms) if frac else '%02d:%02d' % (m, s)
+
+# check for thumbnail image file name, i.e. '^\d{8}\.png$'; plain string
+# operations are cheaper than a regex match, applied to every dir entry
+def is_thumb_name(name):
+    return len(name) == 12 and name.endswith('.png') and name[:8].isdecimal()
 
 def str2bool(s):
     if type(s) == type(True):
         return s
-    if s and type(s) == type(' '):
+    if s and isinstance(s, str):
         return s.lower() in ['true', '1', 'on', 'y', 'yes']
     return False
 
 def str2int(s):
     if type(s) == type(1):
         return s
-    if s and type(s) == type(' '):
-        return int(re.match(r'^\s*([+-]?\d+)', s).groups()[0])
+    if s and isinstance(s, str):
+        m = _INT_RE.match(s)
+        return int(m.group(1)) if m else 0
     return 0
 
 def str2float(s):
     if type(s) == type(1.1):
         return s
-    if s and type(s) == type(' '):
-        m = re.match(r'^\s*([+-]?([0-9]+([.][0-9]*)?|[.][0-9]+))', s)
-        return float(m.groups()[0])
+    if s and isinstance(s, str):
+        m = _FLOAT_RE.match(s)
+        return float(m.group(1)) if m else 0.0
     return 0.0
 
 def sfrac2float(s):
@@ -150,20 +199,44 @@ def hr_size(sz, prec=1):
     prec = prec if i else 0
     return '%.*f %s' % (prec, sz, ['', 'KiB', 'MiB', 'GiB', 'TiB'][i])
 
+def json_loads(s):
+    # prefer the much faster orjson parser, if available
+    return orjson.loads(s) if orjson else json.loads(s)
+
+def json_dumps(obj, indent=True):
+    # serialize to (indented) UTF-8 encoded bytes
+    if orjson:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    if indent:
+        return json.dumps(obj, indent=2).encode()
+    return json.dumps(obj, separators=(',', ':')).encode()
+
 def ppdict(dic, excl=[]):
-    s = ''
-    with io.StringIO() as sf:
-        for k, v in dic.items():
-            if v is not None and not k in excl:
-                print(k+':', v, file=sf)
-        s = sf.getvalue()
-    return s.strip()
+    return '\n'.join('%s: %s' % (k, v) for k, v in dic.items()
+                        if v is not None and not k in excl).strip()
 
 def proc_running():
     if 'proc' in globals():
         global proc
         return proc
 
+def set_pipe_size(pipe, size=_PIPE_SIZE):
+    # enlarge the kernel pipe buffer (Linux only), so the child can push
+    # larger chunks without stalling on a full 64 KiB default pipe
+    if pipe is None or fcntl is None or cfg['platform'] != 'Linux':
+        return
+    try:
+        fcntl.fcntl(pipe.fileno(), getattr(fcntl, 'F_SETPIPE_SZ', 1031), size)
+    except OSError as e:
+        eprint(1, 'unable to set pipe size:', str(e),
+               '(try raising /proc/sys/fs/pipe-max-size)')
+
+def start_proc(cmd, stdout=PIPE, stderr=PIPE):
+    p = Popen(cmd, shell=False, stdout=stdout, stderr=stderr, env=cfg['env'])
+    set_pipe_size(p.stdout)
+    set_pipe_size(p.stderr)
+    return p
+
 def kill_proc(p=None):
     if p is None and 'proc' in globals():
         global proc
@@ -171,21 +244,22 @@ def kill_proc(p=None):
         proc = p
     if proc is not None:
         eprint(1, 'killing subprocess: %s' % proc.args)
-        proc.terminate()
         try:
-            proc.wait(timeout=3)
-        except subprocess.TimeoutExpired:
-            proc.kill()
+            proc.terminate()
+            try:
+                proc.wait(timeout=3)
+            except TimeoutExpired:
+                proc.kill()
+        except OSError as e:
+            # process already gone, or its pipes torn down
+            eprint(1, str(e))
         proc = None
     return None
 
 def die(rc):
     kill_proc()
-    if '_ffdbg_thread' in globals():
-        global _ffdbg_thread, _ffdbg_run
-        _ffdbg_run = False
-        eprint(0, 'waiting for debug thread to finish')
-        _ffdbg_thread.join()
+    if '_ffdbg_exit' in globals():
+        _ffdbg_exit()
     sys.exit(rc)
 
 def sig_handler(signum, frame):
@@ -291,7 +365,7 @@ class ffConfig:
         args = parser.parse_args()
         # if requested print only version and exit
         if args.version:
-            print('ffpreview version %s running on python %.1f.x (%s)'
+            print('ffpreview version %s running on python %s.x (%s)'
                     % (_FFPREVIEW_VERSION, _PYTHON_VERSION, cfg['platform']))
             die(0)
         # parse config file
@@ -326,7 +400,7 @@ class ffConfig:
         if args.addss is not None:
             cfg['addss'] = args.addss
         if args.grid:
-            grid = re.split(r'[xX,;:]', args.grid)
+            grid = _GRID_RE.split(args.grid)
             cfg['grid_columns'] = int(grid[0])
             if len(grid) > 1:
                 cfg['grid_rows'] = int(grid[1])
@@ -360,13 +434,40 @@ class ffConfig:
         cls.fixup_cfg(cfg)
         return cls.set(cfg)
 
+    @classmethod
+    def parse_cfgfile(cls, fname, section='Default'):
+        # minimal INI reader: collects the 'key=value' or 'key: value'
+        # lines of one section, keys are case-insensitive, lines starting
+        # with '#' or ';' are comments, a key without value maps to None
+        opts = None
+        cur = None
+        with open(fname, 'r') as cf:
+            for line in cf:
+                line = line.strip()
+                if not line or line[0] in '#;':
+                    continue
+                if line[0] == '[' and line[-1] == ']':
+                    cur = line[1:-1].strip()
+                    if cur == section and opts is None:
+                        opts = {}
+                    continue
+                if cur is None:
+                    raise ValueError('line outside of section: %r' % line)
+                if cur != section:
+                    continue
+                m = _CFG_KV_RE.match(line)
+                if m:
+                    opts[m.group(1).lower()] = m.group(2)
+                else:
+                    opts[line.lower()] = None
+        if opts is None:
+            raise ValueError('no section: %r' % section)
+        return opts
+
     @classmethod
     def load_cfgfile(cls, cfg, fname, vo=1):
-        fconf = ConfigParser(allow_no_value=True, defaults=cfg)
         try:
-            cf = fconf.read(fname)
-            for option in fconf.options('Default'):
-                cfg[option] = fconf.get('Default', option)
+            cfg.update(cls.parse_cfgfile(fname))
         except Exception as e:
             eprint(1, str(e), '(config file', fname, 'corrupt?)', vo=vo)
             return False
@@ -392,6 +493,8 @@ class ffConfig:
         cfg['start'] = str2float(cfg['start'])
         cfg['end'] = str2float(cfg['end'])
         cfg['addss'] = str2int(cfg['addss'])
+        # video file extensions for fast lookup, e.g. '*.mp4' -> '.mp4'
+        cfg['vformats_set'] = frozenset(s.lstrip('*').lower() for s in cfg['vformats'].split())
         return True
 
     @classmethod
@@ -410,20 +513,40 @@ class ffConfig:
         if cls.cfg is None:
             cls.cfg = {}
         if updcfg:
-            cls.cfg.update(deepcopy(updcfg))
+            cls.cfg.update(updcfg)
+            cls._copy_mutables(cls.cfg, updcfg)
         return cls.cfg
 
     @classmethod
     def get_defaults(cls):
-        return deepcopy(cls.cfg_dflt)
+        return cls._copy_mutables(dict(cls.cfg_dflt), cls.cfg_dflt)
+
+    @classmethod
+    def _copy_mutables(cls, dst, src):
+        # all other values are immutable scalars, no need to deepcopy
+        for k in ('env', 'vid'):
+            if k in src:
+                dst[k] = src[k].copy()
+        return dst
 
 
 ############################################################
 # Qt classes
 
-class ffIcon:
+class _ffIconMeta(type):
+    # decode icons on first access, e.g. ffIcon.ok or ffIcon.ok_pxm
+    def __getattr__(cls, name):
+        if name.endswith('_pxm'):
+            return cls.pixmap(name[:-4])
+        if name in _ICON_BYTES:
+            icon = cls._icons.get(name)
+            if icon is None:
+                icon = cls._icons[name] = QIcon(cls.pixmap(name))
+            return icon
+        raise AttributeError(name)
+
+class ffIcon(metaclass=_ffIconMeta):
     """ Icon resource storage with only class attributes, not instantiated."""
-    initialized = False
     apply_png = """iVBORw0KGgoAAAANSUhEUgAAABAAAAAQCAMAAAAoLQ9TAAABDlBMVEX///8ATwAATAAASQAATQAOaAsBWwEATgARaw4AWwAATgASaxAEUwQATAAVaxITZBIATAAshCMEUwQAVQAXaRUJXwcATQAOaAwDUgMXZhUQXA0ASwACUAIYXRQATgACTgIXVhECTgIaVBIATQAC
 TQIcUBQCSAIcUBEATAAATQAATgB2tWOay3u26qF5uGGTxnCZ0pCZ0I+QwW+m0HdYoEKRxWmJxnuIwnqQvWuayGhztGSTyGpZn0GOxGB/wGh7u2aWw2xKjTCKwVtksVCPyVxbnD+KwVd3wFV2vFmdyW1OizGDwkpQrCqCxkVkujJdsi2JvUtOgi1/yDVHug5XwhiOx0RU
 gy2R3j6Y1UdNfSlq55gUAAAAK3RSTlMAHXIOIe3YDeu8bPWRG+nWa/6QGOf1MtuV5vYzjfc0mvmd+TWg+qP6NkYkIiPNwAAAAIJJREFUGNNjYCAFMDIxo/BZWLXZ2JHlOXR09ThBLC5uHiDJy6dvYGjED2QJCBqbCDEIi5iamVuIigEFxC2trG0kJG3t7B2kpEE6ZByd
@@ -463,13 +586,6 @@ KDULU/0xhuEnOZZ5/Jqy8L1ZxpbuLjNhqj9mYXQJocX2QXwx1s3Afya7hIFOf0S+f7NXCS22DwJUgWIX
 XAD0wLoKReCuaBzyb381UO3ltEgBAMq4dIqoQ/MOgjxHErIR0EbLWj7+vM7tfZ8fOtk0s9lBgW22e0NbRvGmbZ+Da/Nj9Pwe2q1Mn/Sw6WBAU1h/Z8Rh4d9Y6BHCDo4Q8H8KtKCQ8RIxc9BmRHIue1jQpq+idSK/z/OTreiY1gAAZCxnQP5z5TVeG/nezAMA1Nn6Tqo+
 k85yUAQypgjgj7sJgN/B3X2LXE4A+lpIhSKQhGyMRz08wrkaoq+aK7Cz4jiGbMDDEI96VMZ1FWf6tqT6lQffrOL7iYnT1uc/hn30dnKqOdm3JdXxNIRoY/c8Qhc6lrHc1RrSP9zwxOTN3nEl2tg9D50KECIbVjBJMqJ4QxJI6fofA58KllIhsmEF4R5qZem5Hqvtq3SZ
 VU2W+bgTL3wNRe6RW6IlPddj4omUNhcYOm0m5SgqIOzgL/oO5qijSLZZAAAAAElFTkSuQmCC
-"""
-    info_png = """iVBORw0KGgoAAAANSUhEUgAAABAAAAAQCAMAAAAoLQ9TAAABwlBMVEX///////////////+7zd69z9////////////////9skrZKfKxcjLp5pMhvm8Rdjbp/o8T///8uYpYxa6Nai71IfKwTSoMmYZoANG4ERoUHUJMLSYEAOHMAQYEAOXMAQ4UALWkAOXMAQ4QALWoA
-KnEAOHEAQH8AKGsAN3EAO3gANXAANnAAN3EAOHQAOHUANnAANW8ANXAAAAAANXAAOHQCOXUANXAAM3AHPHQHQHcFRHkJQ3kDOnMBLWgALWiErM2Vtda3zeW+0ui90ei3zeahvtwmYp6evNyMsNd9pdKHrNWKrtekwN5Jg7h6os1xnMxwm8x8pND5+/2AptFCd65lk8di
-kcZynMz8/f5kk8dDfLVDerVViL9olMVnk8RLgbpEfLZIf7n///9HgLtIf7tPhLo2cLE6dbI6eLg5e7o7fb85e7wqbrIbYKQFT5sASJIBTZgGVaQKYK8OZLTu7u4AX7YAXbQAWKwAUqIAS5YARIoAUJ4AV6oAXrYAYLgAY70AZL8ASpMAUaEAW7EAa8kAV6sAPn4AWq4A
-ZsIAa8oActQAdtwAb88APn8AOqQAX7MAWtYAX90AZbwAPagBOXMAOXMa0d8aAAAAP3RSTlMAAQYLISINCAIDOMXx/vXPPwR8+PuKc34n9fYpq6zf3xH9/RES/f0T6OjExTn7+zqZmQGf/f2gQtv5+t9DHh7QNZoPAAAA5klEQVQY02NgAAJGJmYWVjZ2DgYo4OTi5uG1
-5+MXEITwOYSEHRydnF1cRUQhImJu7h6eXl6e3j6+4oxAvoSkn39AYFBQYIB/sJQ0UEAmJDQsLDwiIjwsLDJKFiggFx0DBLFxIDJenoFBQTEhMTExKSkpOSUxMVVJmUFFNS09PSMzKSkrOyc3T02dgUEjv6CwqLikpLSsvKJSE2iGVlV1TW1dSUl9Q21NozZQQEe3qbm+
-BAha6lv19EEOM2hr7+js6u7qqes1BLvUyNikr3/CxEmTTc2MoL4zt7CcMtXK2oYBCdjaQRkADNM7nD2IGIMAAAAASUVORK5CYII=
 """
     ok_png = """iVBORw0KGgoAAAANSUhEUgAAABAAAAAQCAMAAAAoLQ9TAAABDlBMVEX///8JIzUJHToAEjcIHz4WM1oOJ00AFDsaNVwMJUsJHzsdOV8OIUMJHDkdNVoeN1kKHTkvTXYOIkILIDUdNVYVMFcGHDcZMVUOIj8aMk0aNFYFHjcLHz8cNVMFGzcKHj0aMUYJGjwLIDsXMEAI
 GzsMHjoYMT4HGjoAAAALHzcbND8HHzoKHTpph6h9mrWryt5ig6VwjKiUsshvi6h0kalEYINifpp/m7J+m7Jng59depZnhJ1lgZs7VG9VcYdphZ5ifZgsSGlRa4dbd5RgfZo1TFpNanpmgZ9kgJxje5MtRl1PaolUcJNadpdbdptWcJREX3kqRFNSb5ZffKhigKxQbYkz
@@ -482,13 +598,6 @@ xMrg4uUAFDEYOVsAHkXo6OrO0dXQ0ta1u8OHor6nzeuozeqpzeuozeuqzuu84PxPdp+84PunzOqmy+mm
 Z5tAdrQ/dLBAdLBDerknRGZYf62Hrd+FqdqGqdqDqdqKsONQZIGBqN19o9h+pNh8o9h4o9l8o9l+pNl+o9l5o9l6o9h+o9iBqeD0enAlAAAAGHRSTlMAAANJSz0IyZb+1bq5r0F6e3x9fn+Bf0Lax4JAAAABAElEQVQY02NgYGJmAQFWNgYIYJeQBAMpDjCXkUFaRlJW
 Tl5BkVNJWUVVjYuBQV1DUk5OU1ZLW1JHV0/fgIHB0EjSWFPTxNRM0tzC0sqagcHGECQgZ2sHNMfewZGBwclZ0kTOxdVF0c3dw9PLm4HBx1dSzs8/IDAoOCQ0LDyCgSEyKjomNi4+ITEpOTk5JZWbIS09IzMrOyc3L78gLz+/sIihuKS0rKy8vKKysrKqurqmlqGuvqGh
 saGpuQVINra2tTN0dHYBQTcQgkBPL0Nff+uEiRNaQcSkCa2TpzDwTJ02fcbMWbNnz5k7b/r8BbwMfPwCgkLCIqKiYsJCggL84gBhOUmZU0MiDgAAAABJRU5ErkJggg==
-"""
-    question_png = """iVBORw0KGgoAAAANSUhEUgAAABgAAAAYCAMAAADXqc3KAAABlVBMVEUAAAAyaKQ2Z6UzZqVIdK1FcqxIda1EcqxEcqs1ZqQAAAAuXJVFcaxEcawsWI8AAAAAAAAAAAAAAAApU4ZEcasnT4AAAAAAAAAAAAAAAAAAAAAAAAAmTXwkSXYAAAAAAAAAAAAmTHslSXcAAAAA
-AAAAAAAmT300ZaEmTnsAAAAAAAAAAAAAAAAAAADa5PDV4e7i6/S3zeS3zOTf6PPj6/S4zuVnlMdlk8bf6PK5z+ZqmMlolshkksW70Odtm8xsmctql8lolchjkcVwnc5vnM1tmstrmMpmlMZkkcVhj8O3zOPe5/K6z+f3+fz5+/3x9frP3e2HqtJfjcK2y+O4zuZrmcpt
-msxum8zG1+ukwN6uxuL////d5/JfjcFci8C2yuLe5/G4zeVplsiLrdRgjsNejMFcir9ZiL7Q3Otpl8mRs9f4+v3z9vqApc9di8Bbib9Zh72xx+DS3uxnlcdmlMfs8viDqNBgjsJcisBaib6wx+Dd5vG4zeRlksZjkcRikMTd5/FejcFbir9fjsJaiL62y+LQ3eveT0o1
-AAAALnRSTlMATOFV9/f39/fhBl74+GINBQ4WafhuHgQIERkicXcqByVydiwBE2TlZgkCChIQvDkr4AAAAUpJREFUKM9jYKAAMDIxMWITZ2bR02dlxiLOZmBoZIwpw8xmYmpmbmSBLgMUt7SyNrNBlwGK29rZOziaO6HKgMSdXVzdrN09PL28ETJAcR8XZxdfP/+AQM+g
-YG92qAwji0FIaFh4eERkVHSMZ2xcfAIHxD9MeonWDqH2oVZJydEmKalp6fEZnBAJ/UQz68zMTOus7JzcoLz8gsIiiAQjq3Giu1lxcUlpdFl5akVlVTXUKAZmVuMaG/Nam7r6lNi8/MIGDoSzWC1q6uvro6Mb85oKEziQPcJq4VXeHJsKEmdH9joXN4+FV15eWn5hAi8f
-vwBCXFBImMc7uLKlqkFEVExIUBwmISEpJS3Dm9BaWC0iKyctJSkPkxAQFBJTUORtKxJRUlYQE+JXgZslzq8qJaamrq4hLSalqqmCZDuDFpe2oKSOLr+mOAMBAAAs80S883HicAAAAABJRU5ErkJggg==
 """
     refresh_png = """iVBORw0KGgoAAAANSUhEUgAAABAAAAAQCAMAAAAoLQ9TAAACNFBMVEUhxhIcMVMcMlUhO2MvVI42YaMoSHkdM1YcMVMcMVMcMVMcMVMcMlQrTIEqS34cMlUcMVMnRnYhO2MeNls6aK88a7UrTYIcMlUzW5ocMVMnRXUcMlQwVpEfNlwhOmIdNFgdM1YfN1wkQGwhOmIh
 OmIcMVMfN10kP2skP2sdNFcgOmEgOWAiPGYdM1ccMVMcMVMcMlUdM1YdM1YcMlQfNlwhOmIcMVMcMlUtUIctUYgoR3cjPmgcMlQdM1YzW5kiPWccMlQcM1UfNlwrTIE4ZKk2X6EzWpklQnAcMVMgOF83YaQ3YqVDc8BAcb89bLc6Zq00XZ0lQnAcMVMnRXREdME+brkj
@@ -514,53 +623,30 @@ wB6M4Tif51iJ4DNtvh2/wbuChYZATD9FfRNaqRB70ClaqA8xPzEuNDa6vbbT1ND////29/X19vT7+/r+
 PNPFPt3IL9fL4czKvs7w7S42D9ScAAAAjUlEQVQY02NgAANGJmYWBmTAKiTMhiIgIiomQpEAOwcnSICLG2YRj7iEpKiYlLQML1SAT1ZOXkFMUUmZGSrAwq+iqiamriEgCOFramnr6Orp6esYGBqBBYxNTM3MLSytrG1s7cAC9g6OTiYmJs4urm7uYAEPT1cvbx9fPxdX
 Tw+wgH8AHPiDBQKRAAMDAFjyF6ty/R1iAAAAAElFTkSuQmCC
 """
-    warning_png = """iVBORw0KGgoAAAANSUhEUgAAABAAAAAQCAMAAAAoLQ9TAAABQVBMVEX////6sgX8sQb8uQX7uUD5uAX7sw36rgv9uQL6tgX6tQ35sgn7twT5tAT3tBH3sA33sgH2rwH/mQD0qgjyqQb/zADzowHzpAH/ogDwmg7wmQroogDwkgDwkQDpdwDqfATpegLrggblZgDmbgbo
-eQD7vlL/16v+06X8vlL/2q7/1qX8u0r/0o3LbzjLbjb+y3j7wUj/0oC8RxL/zGf7vTj+0mr/0mXDSRP/zkv+y0X6wTP/1VH/1lLMViLOWyn/1UD/1Dn5wSv+yQX/zgD/0QDddRXccg//1gD/1wD+1Af3uhD/2AD/3AD/4AD/4gD/5AD/5QD/4wD3wBD+3AX/6AD/7QDm
-fxD/8wD/8QD+5gn2vBf/6gD/7wD/9ADqfxHqgBH/9wD/8gD2vhf92CT/5hf/5gD/6QD/7AD/5wD/4xf92yY5YL/DAAAAJXRSTlMAY1VX/lzn6Wtv7O17fvHyiYsF9vYFmZcL+voLqKbq6pb49/aTMf8OLAAAAJ5JREFUGNNjYMABGJlQ+cwsqqwoAmxq6uzIfA4NTS1t
-TiQBLh1dPX1uBJ/HwNDIyNiEFy7AZ2pmbm5hyQ/jC1hZ29ja2Ts4CkL4QsJOzi6ubu4eniKiYAExL28fXz//gIDAIHEQX0Iy2D8kNCwsPCI0UkoaKCAT5R8dExsXn5AYGpIkCxSQS05JTUsPTY/OCMzMkgcKKCgqwYGyCqa3AZWSG22RwdIDAAAAAElFTkSuQmCC
-"""
-    def __new__(cls):
-        if cls.initialized:
-            return
-        cls.initialized = True
-        # NOTE: commented icons are currently unused
-        cls.apply_pxm = sQPixmap(imgdata=ffIcon.apply_png)
-        cls.apply = QIcon(ffIcon.apply_pxm)
-        cls.broken_pxm = sQPixmap(imgdata=ffIcon.broken_png)
-        cls.broken = QIcon(ffIcon.broken_pxm)
-        cls.close_pxm = sQPixmap(imgdata=ffIcon.close_png)
-        cls.close = QIcon(ffIcon.close_pxm)
-        cls.delete_pxm = sQPixmap(imgdata=ffIcon.delete_png)
-        cls.delete = QIcon(ffIcon.delete_pxm)
-        cls.error_pxm = sQPixmap(imgdata=ffIcon.error_png)
-        cls.error = QIcon(ffIcon.error_pxm)
-        cls.ffpreview_pxm = sQPixmap(imgdata=ffIcon.ffpreview_png)
-        cls.ffpreview = QIcon(ffIcon.ffpreview_pxm)
-        #cls.info_pxm = sQPixmap(imgdata=ffIcon.info_png)
-        #cls.info = QIcon(ffIcon.info_pxm)
-        cls.ok_pxm = sQPixmap(imgdata=ffIcon.ok_png)
-        cls.ok = QIcon(ffIcon.ok_pxm)
-        cls.open_pxm = sQPixmap(imgdata=ffIcon.open_png)
-        cls.open = QIcon(ffIcon.open_pxm)
-        #cls.question_pxm = sQPixmap(imgdata=ffIcon.question_png)
-        #cls.question = QIcon(ffIcon.question_pxm)
-        cls.refresh_pxm = sQPixmap(imgdata=ffIcon.refresh_png)
-        cls.refresh = QIcon(ffIcon.refresh_pxm)
-        cls.remove_pxm = sQPixmap(imgdata=ffIcon.remove_png)
-        cls.remove = QIcon(ffIcon.remove_pxm)
-        cls.revert_pxm = sQPixmap(imgdata=ffIcon.revert_png)
-        cls.revert = QIcon(ffIcon.revert_pxm)
-        cls.save_xpm = sQPixmap(imgdata=ffIcon.save_png)
-        cls.save = QIcon(ffIcon.save_xpm)
-        #cls.warning_pxm = sQPixmap(imgdata=ffIcon.warning_png)
-        #cls.warning = QIcon(ffIcon.warning_pxm)
+    _icons = {}
+
+    @classmethod
+    def pixmap(cls, name):
+        # decode embedded image, unless still held in the pixmap cache
+        key = 'ffIcon/' + name
+        pxm = QPixmapCache.find(key)
+        if pxm is None:
+            pxm = sQPixmap(rawdata=_ICON_BYTES[name])
+            QPixmapCache.insert(key, pxm)
+        return pxm
+
+# raw PNG data of all icons, base64 decoded once at import
+_ICON_BYTES = {k[:-4]: base64.b64decode(v) for k, v in vars(ffIcon).items()
+                if k.endswith('_png')}
 
 
 class sQPixmap(QPixmap):
-    def __init__(self, *args, imgdata=None, **kwargs):
+    def __init__(self, *args, imgdata=None, rawdata=None, **kwargs):
         super().__init__(*args, **kwargs)
         if imgdata is not None:
-            super().loadFromData(base64.b64decode(imgdata))
+            rawdata = base64.b64decode(imgdata)
+        if rawdata is not None:
+            super().loadFromData(rawdata)
 
 class sQIcon(QIcon):
     def __init__(self, *args, imgdata=None, **kwargs):
@@ -568,36 +654,127 @@ class sQIcon(QIcon):
         if imgdata is not None:
             super().addPixmap(sQPixmap(imgdata=imgdata))
 
+# decode image files in a thread pool; unlike QPixmap, QImage may be
+# used outside the GUI thread
+def load_images(paths, prog_cb=None):
+    images = []
+    nthreads = max(1, QThread.idealThreadCount())
+    with ThreadPoolExecutor(max_workers=nthreads) as ex:
+        for img in ex.map(QImage, paths):
+            images.append(img)
+            if prog_cb and len(images) % 100 == 0:
+                prog_cb(len(images), len(paths))
+    return images
+
+# load thumbnail images, unless still held in the pixmap cache; stamp
+# identifies the thumbnail set, e.g. the index file creation date
+def thumb_pixmaps(paths, stamp, prog_cb=None):
+    keys = ['thumb/%s:%s' % (path, stamp) for path in paths]
+    pxms = [QPixmapCache.find(key) for key in keys]
+    miss = [i for i, pxm in enumerate(pxms) if pxm is None]
+    if miss:
+        # decode off the GUI thread, convert to pixmaps on it
+        worker = tWorker(load_images, [paths[i] for i in miss])
+        for i, img in zip(miss, worker.wait_result(prog_cb)):
+            pxms[i] = QPixmap.fromImage(img)
+            if not pxms[i].isNull():
+                QPixmapCache.insert(keys[i], pxms[i])
+    return pxms
+
+# thumbnail index entry: sequence number, image file name, timestamp
+tInfo = namedtuple('tInfo', 'n name ts')
+
+
 class tLabel(QWidget):
-    __slots__ = ['info']
+    """ Thumbnail with timestamp caption, painted directly. """
+    __slots__ = ['info', 'pixmap', 'text', '_hl', '_ty', '_size']
     notify = pyqtSignal(dict)
-
-    def __init__(self, *args, pixmap=None, text=None, info=None, receptor=None, **kwargs):
+    # number of live instances, for debugging
+    instances = 0
+    # (highlight brush, highlight text color, text color) per palette
+    # color group, shared by all labels; dropped on palette change
+    _colors = {}
+
+    def __init__(self, *args, pixmap=None, text=None, info=None, size=None,
+                 receptor=None, **kwargs):
         super().__init__(*args, **kwargs)
-        layout = QVBoxLayout(self)
-        layout.setSpacing(0)
-        layout.setContentsMargins(0,0,0,0)
-        if pixmap is not None:
-            pl = QLabel()
-            pl.setPixmap(pixmap)
-            pl.setAlignment(Qt.AlignCenter)
-            pl.setStyleSheet('QLabel {padding: 2px;}')
-            layout.addWidget(pl)
+        self._hl = False
+        self.rebind(pixmap, text, info, size)
+        self.notify.connect(receptor)
+        tLabel.instances += 1
+        self.destroyed.connect(tLabel._destroyed)
+
+    @classmethod
+    def _destroyed(cls):
+        cls.instances -= 1
+
+    # label size for given pixmap size and caption; pixmap has 2px
+    # padding on each side, caption goes below
+    @classmethod
+    def precompute_size(cls, pixmap_size, fm, text=None):
+        w = h = 0
+        if pixmap_size is not None:
+            w = pixmap_size.width() + 4
+            h = pixmap_size.height() + 4
         if text is not None:
-            tl = QLabel()
-            tl.setText(text)
-            tl.setAlignment(Qt.AlignCenter)
-            layout.addWidget(tl)
+            w = max(w, fm.horizontalAdvance(text))
+            h += fm.height()
+        return QSize(w, h)
+
+    # (re)assign contents, allows for recycling of existing labels;
+    # pass a precomputed size when filling a grid of same sized labels
+    def rebind(self, pixmap=None, text=None, info=None, size=None):
+        self.pixmap = pixmap
+        self.text = text
         self.info = info
-        self.notify.connect(receptor)
-        self.adjustSize()
-        self.setMaximumSize(self.width(), self.height())
+        self._hl = False
+        self._ty = pixmap.height() + 4 if pixmap is not None else 0
+        if size is None:
+            size = self.precompute_size(pixmap.size() if pixmap is not None else None,
+                                        self.fontMetrics(), text)
+        self._size = size
+        self.setFixedSize(size)
+        self.update()
+
+    def sizeHint(self):
+        return self._size
+
+    def set_highlight(self, hl=True):
+        if hl != self._hl:
+            self._hl = hl
+            self.update()
+
+    def changeEvent(self, event):
+        if event.type() == QEvent.PaletteChange:
+            tLabel._colors = {}
+        super().changeEvent(event)
+
+    def paintEvent(self, event):
+        pal = self.palette()
+        colors = tLabel._colors.get(pal.currentColorGroup())
+        if colors is None:
+            colors = (pal.highlight(), pal.highlightedText().color(),
+                      pal.windowText().color())
+            tLabel._colors[pal.currentColorGroup()] = colors
+        hl_brush, hl_color, fg_color = colors
+        p = QPainter(self)
+        if self._hl:
+            p.fillRect(self.rect(), hl_brush)
+            p.setPen(hl_color)
+        else:
+            p.setPen(fg_color)
+        if self.pixmap is not None:
+            p.drawPixmap((self.width() - self.pixmap.width()) // 2, 2, self.pixmap)
+        if self.text is not None:
+            p.drawText(QRect(0, self._ty, self.width(), self.height() - self._ty),
+                       Qt.AlignCenter, self.text)
+        p.end()
 
     def mouseReleaseEvent(self, event):
         self.notify.emit({'type': 'set_cursorw', 'id': self})
 
     def mouseDoubleClickEvent(self, event):
-        self.notify.emit({'type': 'play_video', 'ts': self.info[2],
+        self.notify.emit({'type': 'play_video', 'ts': self.info.ts,
                     'pause': not (QApplication.keyboardModifiers() & Qt.ShiftModifier)})
 
     def contextMenuEvent(self, event):
@@ -607,61 +784,122 @@ class tLabel(QWidget):
 class tFlowLayout(QLayout):
     """ Based on Qt flowlayout example, heavily optimized for speed
         in this specific use case, stripped down to bare minimum. """
-    def __init__(self, parent=None, size=1):
+    def __init__(self, parent=None):
         super().__init__(parent)
-        self._items = [None] * size
-        self._icnt = 0
+        self._items = []
         self._layout_enabled = False
+        self._grid = None
+        self._placed = set()
+        self._placing = False
+        self._vrange = None
+        self._xpos = ()
 
     def enableLayout(self):
         self._layout_enabled = True
 
+    # only items intersecting the vertical range top..bottom (plus a few
+    # rows of margin, to avoid pop-in while scrolling) get placed, items
+    # leaving that range are hidden again; widgets must be added
+    # explicitly hidden, they are shown when placed
+    margin_rows = 2
+
+    def setVisibleRange(self, top, bottom):
+        self._vrange = (top, bottom)
+        if self._grid:
+            self._placeRange()
+
     def addItem(self, item):
-        self._items[self._icnt] = item
-        self._icnt += 1
+        self._items.append(item)
 
     def itemAt(self, index):
-        if 0 <= index < self._icnt:
+        if 0 <= index < len(self._items):
             return self._items[index]
 
+    def count(self):
+        return len(self._items)
+
     def hasHeightForWidth(self):
         return self._layout_enabled
 
     def heightForWidth(self, width):
         if self._layout_enabled:
-            return self.doLayout(QRect(0, 0, width, 0), True)
+            return self.doLayout(0, 0, width, True)
         return -1
 
     def setGeometry(self, rect):
         if self._layout_enabled:
-            self.doLayout(rect, False)
+            self.doLayout(rect.x(), rect.y(), rect.right() + 1, False)
 
     def sizeHint(self):
         return QSize()
 
-    def doLayout(self, rect, testonly):
-        if not self._icnt:
+    # geometry is passed as plain ints, and items are placed through the
+    # integer setGeometry overload, so no Qt value objects get allocated
+    def doLayout(self, x0, y0, right, testonly):
+        n = len(self._items)
+        if not n:
             return 0
-        x = rect.x()
-        y = rect.y()
-        right = rect.right() + 1
-        iszhint = self._items[0].sizeHint()
+        # NOTE: ask the widget, as QWidgetItem reports hidden items as empty
+        iszhint = self._items[0].widget().sizeHint()
         iwidth = iszhint.width()
         iheight = iszhint.height()
-        ngaps = int(right / iwidth)
-        gap = 0 if ngaps < 1 else int((right % iwidth) / ngaps)
-        for i in range(self._icnt):
-            nextX = x + iwidth
-            if nextX > right:
-                x = rect.x()
-                y = y + iheight
-                nextX = x + iwidth + gap
-            else:
-                nextX += gap
-            if not testonly:
-                self._items[i].setGeometry(QRect(QPoint(x, y), iszhint))
-            x = nextX
-        return y + iheight - rect.y()
+        # all items have the same size, so positions follow from a
+        # simple grid with excess width distributed as column gaps
+        cols = max(1, right // iwidth)
+        gap = (right % iwidth) // cols if right >= iwidth else 0
+        xstep = iwidth + gap
+        if not testonly and not self._placing:
+            grid = (x0, y0, cols, xstep, iwidth, iheight)
+            if grid != self._grid:
+                # positions of already placed items are stale now
+                self._placing = True
+                self._grid = grid
+                self._xpos = tuple(range(x0, x0 + cols * xstep, xstep))
+                for i in self._placed:
+                    self._items[i].widget().hide()
+                self._placed.clear()
+                self._placing = False
+            self._placeRange()
+        return ((n - 1) // cols + 1) * iheight
+
+    def _placeRange(self):
+        # NOTE: showing or hiding a widget may re-enter the layout
+        if self._placing:
+            return
+        self._placing = True
+        y0 = self._grid[1]
+        cols = self._grid[2]
+        iheight = self._grid[5]
+        first = 0
+        last = len(self._items)
+        if self._vrange is not None:
+            top, bottom = self._vrange
+            first = max(0, ((top - y0) // iheight - self.margin_rows) * cols)
+            last = min(last, ((bottom - y0) // iheight + 1 + self.margin_rows) * cols)
+        for i in [i for i in self._placed if i < first or i >= last]:
+            self._placed.discard(i)
+            self._items[i].widget().hide()
+        for i in range(first, last):
+            self.placeItem(i)
+        self._placing = False
+
+    # vertical extent of item i in the current grid, if any
+    def itemSpan(self, i):
+        if not self._grid:
+            return None
+        _, y0, cols, _, _, iheight = self._grid
+        top = y0 + i // cols * iheight
+        return top, top + iheight
+
+    def placeItem(self, i):
+        if i in self._placed or not self._grid:
+            return
+        _, y0, cols, _, iwidth, iheight = self._grid
+        r, c = divmod(i, cols)
+        self._placed.add(i)
+        w = self._items[i].widget()
+        w.setGeometry(self._xpos[c], y0 + r * iheight, iwidth, iheight)
+        w.show()
 
 
 class tScrollArea(QScrollArea):
@@ -672,48 +910,100 @@ class tScrollArea(QScrollArea):
         self.delayTimeout = 50
         self._resizeTimer = QTimer(self)
         self._resizeTimer.timeout.connect(self._delayedUpdate)
+        self._pool = []
+        self.verticalScrollBar().valueChanged.connect(self._update_visible)
 
     def resizeEvent(self, event):
         self._resizeTimer.start(self.delayTimeout)
         self.rsz_event = event
+        # NOTE: the viewport is only resized later on, in do_update(),
+        # until then the new size of the whole area has to do
+        self._set_vrange(event.size().height())
 
     def _delayedUpdate(self):
         self._resizeTimer.stop()
         # ask parent to call our own do_update()
         self.notify.emit({'type': 'scroll_do_update'})
 
+    # tell thumbnail layout which part of the grid is currently visible
+    def _update_visible(self, _=None):
+        self._set_vrange(self.viewport().height())
+
+    def _set_vrange(self, height):
+        layout = self.widget().layout() if self.widget() else None
+        if layout is not None:
+            top = self.verticalScrollBar().value()
+            layout.setVisibleRange(top, top + height)
+
+    # scroll item idx into view; position follows from the layout grid,
+    # the scrollbar change in turn places the newly visible rows
+    def ensure_visible(self, idx):
+        layout = self.widget().layout()
+        layout.placeItem(idx)
+        span = layout.itemSpan(idx)
+        if span is None:
+            self.ensureWidgetVisible(layout.itemAt(idx).widget(), 0, 0)
+            return
+        sbar = self.verticalScrollBar()
+        top = sbar.value()
+        height = self.viewport().height()
+        if span[0] < top:
+            sbar.setValue(span[0])
+        elif span[1] > top + height:
+            sbar.setValue(span[1] - height)
+
     def do_update(self, tlwidth, tlheight):
         super().resizeEvent(self.rsz_event)
+        self._update_visible()
         if tlwidth < 1 or tlheight < 1:
             return
-        rows = int(self.viewport().height() / tlheight + 0.5)
-        self.verticalScrollBar().setSingleStep(int(tlheight / 5.9287))
+        rows = (self.viewport().height() + tlheight // 2) // tlheight
+        self.verticalScrollBar().setSingleStep(max(1, tlheight * 10000 // 59287))
         cfg['grid_rows'] = rows
-        cols = int((self.viewport().width()) / tlwidth)
-        if cols < 1:
-            cols = 1
+        cols = max(1, self.viewport().width() // tlwidth)
         if cols != cfg['grid_columns']:
             cfg['grid_columns'] = cols
 
     def clear_grid(self):
         if self.widget():
-            self.takeWidget().deleteLater()
+            thumb_pane = self.takeWidget()
+            # drop layout first, else each reparented label has to be
+            # looked up and removed from it individually
+            sip.delete(thumb_pane.layout())
+            # keep thumbnail labels around for reuse
+            for tl in thumb_pane.findChildren(tLabel):
+                tl.setParent(None)
+                tl.rebind()
+                self._pool.append(tl)
+            thumb_pane.deleteLater()
+
+    # get a thumbnail label, recycled from a previous grid if possible
+    def get_tlabel(self, pixmap, text, info, receptor, size=None):
+        if self._pool:
+            tl = self._pool.pop()
+            tl.rebind(pixmap, text, info, size)
+            return tl
+        return tLabel(pixmap=pixmap, text=text, info=info, size=size,
+                      receptor=receptor)
 
     def fill_grid(self, tlabels, progress_cb=None):
         self.setUpdatesEnabled(False)
         l = len(tlabels)
         thumb_pane = QWidget()
         self.setWidget(thumb_pane)
-        layout = tFlowLayout(thumb_pane, l)
-        x = 0; y = 0; cnt = 0
-        for tl in tlabels:
+        layout = tFlowLayout(thumb_pane)
+        self._update_visible()
+        next_tick = 0
+        for cnt, tl in enumerate(tlabels):
+            tl.hide()
             layout.addWidget(tl)
-            if progress_cb and cnt % 100 == 0:
-                progress_cb(cnt, l)
-            x += 1
-            if x >= cfg['grid_columns']:
-                x = 0; y += 1
-            cnt += 1
+            # limit progress updates to ten per second
+            if progress_cb and not cnt & 127:
+                now = time.monotonic()
+                if now >= next_tick:
+                    next_tick = now + 0.1
+                    progress_cb(cnt, l)
+        y, x = divmod(l, max(1, cfg['grid_columns']))
         if y < cfg['grid_rows']:
             cfg['grid_rows'] = y + 1
         if y == 0 and x < cfg['grid_columns']:
@@ -722,14 +1012,101 @@ class tScrollArea(QScrollArea):
         self.setUpdatesEnabled(True)
 
 
-class tmQTreeWidget(QTreeWidget):
-    def __init__(self, *args, load_action=None, **kwargs):
+class tWorker(QThread):
+    """ Run a function in a separate thread, relaying progress via signal. """
+    progress = pyqtSignal(float, float)
+
+    def __init__(self, func, *args, **kwargs):
+        super().__init__()
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.result = None
+
+    def run(self):
+        self.result = self.func(*self.args, prog_cb=self.progress.emit, **self.kwargs)
+
+    # start thread and wait for the result, keeping the GUI responsive
+    def wait_result(self, prog_cb=None):
+        if prog_cb:
+            self.progress.connect(prog_cb)
+        loop = QEventLoop()
+        self.finished.connect(loop.quit)
+        self.start()
+        loop.exec_()
+        self.wait()
+        return self.result
+
+
+class tScanWorker(QThread):
+    """ Scan thumbnail directories in a separate thread, reporting back
+        via signals only. """
+    progress = pyqtSignal(int, int)
+    done = pyqtSignal(list)
+
+    def __init__(self, outdir, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.outdir = outdir
+        # dispose of the thread object only after run() has returned
+        self.finished.connect(self.deleteLater)
+
+    def run(self):
+        try:
+            ilist = get_indexfiles(self.outdir, self.progress.emit)
+        except Exception as e:
+            eprint(0, str(e))
+            ilist = []
+        self.done.emit(ilist)
+
+
+class tmItemModel(QAbstractTableModel):
+    """ Read-only table of QStandardItem rows, replaced as a whole without
+        any per-row notifications. """
+    def __init__(self, headers, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._headers = headers
+        self._rows = []
+
+    def rowCount(self, parent=None):
+        return 0 if parent and parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=None):
+        return 0 if parent and parent.isValid() else len(self._headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if index.isValid():
+            return self._rows[index.row()][index.column()].data(role)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self._headers[section]
+
+    def item(self, row, column):
+        return self._rows[row][column]
+
+    def set_rows(self, rows):
+        self.beginResetModel()
+        self._rows = rows
+        self.endResetModel()
+
+
+class tmQTreeView(QTreeView):
+    def __init__(self, *args, load_action=None, headers=[], **kwargs):
         super().__init__(*args, **kwargs)
         self.load_action = load_action
+        self._model = tmItemModel(headers, self)
+        self.setModel(self._model)
+        # keep track of selected row count, using selection deltas
+        self.nselected = 0
+        self.selectionModel().selectionChanged.connect(self._count_selected)
+
+    def _count_selected(self, selected, deselected):
+        self.nselected += (sum(r.height() for r in selected)
+                           - sum(r.height() for r in deselected))
 
     def contextMenuEvent(self, event):
         menu = QMenu()
-        if self.load_action and len(self.selectedItems()) == 1:
+        if self.load_action and self.nselected == 1:
             menu.addAction('Load Thumbnails', self.load_action)
             menu.addSeparator()
         menu.addAction('Select All', self.select_all)
@@ -738,22 +1115,48 @@ class tmQTreeWidget(QTreeWidget):
         menu.exec_(self.mapToGlobal(event.pos()))
 
     def select_all(self, sel=True):
-        for i in range(self.topLevelItemCount()):
-            self.topLevelItem(i).setSelected(sel)
+        if sel:
+            self.selectAll()
+        else:
+            self.clearSelection()
 
     def select_none(self):
         self.select_all(False)
 
     def invert_selection(self):
-        sel = self.selectedItems()
-        self.select_all()
-        for i in sel:
-            i.setSelected(False)
+        rows = [r for r in range(self._model.rowCount())]
+        self.select_rows(rows, QItemSelectionModel.Toggle)
+
+    def select_rows(self, rows, mode=QItemSelectionModel.Select):
+        sel = QItemSelection()
+        for r in rows:
+            idx = self._model.index(r, 0)
+            sel.select(idx, idx)
+        self.selectionModel().select(sel, mode | QItemSelectionModel.Rows)
+
+    # column 0 model indexes of all selected rows
+    def selected_rows(self):
+        return self.selectionModel().selectedRows()
+
+    # replace all rows at once, announced to the view as single model reset
+    def set_rows(self, rows):
+        hstate = self.header().saveState()
+        self._model.set_rows(rows)
+        # NOTE: the implied selection reset does not emit selectionChanged
+        self.nselected = 0
+        self.header().restoreState(hstate)
 
 class tmDialog(QDialog):
     ilist = []
+    broken_rows = []
     outdir = ''
     loadfile = ''
+    broken_fg = QBrush(QColor('red'))
+    broken_bg = QBrush(QColor('lightyellow'))
+    broken_font = None   # needs QApplication, set up on first use
+    scanner = None
+    cols_fitted = False
+    prog_tick = 0
     def __init__(self, *args, odir='', **kwargs):
         super().__init__(*args, **kwargs)
         self.outdir = odir
@@ -768,15 +1171,15 @@ class tmDialog(QDialog):
         self.tot_label.setToolTip('Approximate size of displayed items')
         self.hdr_layout.addWidget(self.loc_label)
         self.hdr_layout.addWidget(self.tot_label)
-        self.tree_widget = tmQTreeWidget(load_action=self.accept)
-        self.tree_widget.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
-        self.tree_widget.setSelectionMode(QAbstractItemView.ExtendedSelection)
-        self.tree_widget.setRootIsDecorated(False)
-        self.tree_widget.setColumnCount(4)
-        self.tree_widget.setHeaderLabels(['Name', 'Count', 'Size', 'Date Modified'])
-        self.tree_widget.itemDoubleClicked.connect(self.accept)
-        self.tree_widget.itemSelectionChanged.connect(self.sel_changed)
-        self.tree_widget.setAlternatingRowColors(True)
+        self.tree_view = tmQTreeView(load_action=self.accept,
+                            headers=['Name', 'Count', 'Size', 'Date Modified'])
+        self.tree_view.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.tree_view.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.tree_view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.tree_view.setRootIsDecorated(False)
+        self.tree_view.doubleClicked.connect(self.accept)
+        self.tree_view.selectionModel().selectionChanged.connect(self.sel_changed)
+        self.tree_view.setAlternatingRowColors(True)
         self.filter_layout = QHBoxLayout()
         self.filter_check = QCheckBox('Filter:')
         self.filter_check.setTristate(False)
@@ -785,7 +1188,11 @@ class tmDialog(QDialog):
         self.filter_check.stateChanged.connect(self.redraw_list)
         self.filter_edit = QLineEdit()
         self.filter_edit.setToolTip('Filter list by text contained in name')
-        self.filter_edit.textChanged.connect(self.redraw_list)
+        # delay list update until user stops typing
+        self._filterTimer = QTimer(self)
+        self._filterTimer.setSingleShot(True)
+        self._filterTimer.timeout.connect(self.redraw_list)
+        self.filter_edit.textChanged.connect(lambda: self._filterTimer.start(150))
         self.filter_layout.addWidget(self.filter_check, 1)
         self.filter_layout.addWidget(self.filter_edit, 200)
         self.btn_layout = QHBoxLayout()
@@ -802,7 +1209,7 @@ class tmDialog(QDialog):
         self.invert_button = QPushButton("Invert Selection")
         self.invert_button.setIcon(ffIcon.revert)
         self.invert_button.setToolTip('Invert the current selection')
-        self.invert_button.clicked.connect(self.tree_widget.invert_selection)
+        self.invert_button.clicked.connect(self.tree_view.invert_selection)
         self.selbroken_button = QPushButton("Select Broken")
         self.selbroken_button.setIcon(ffIcon.remove)
         self.selbroken_button.setToolTip('Select orphaned or otherwise corrupted thumbnail directories')
@@ -826,84 +1233,128 @@ class tmDialog(QDialog):
         self.btn_layout.addWidget(QLabel('     '))
         self.btn_layout.addWidget(self.close_button)
         self.dlg_layout.addLayout(self.hdr_layout)
-        self.dlg_layout.addWidget(self.tree_widget)
+        self.dlg_layout.addWidget(self.tree_view)
         self.dlg_layout.addLayout(self.filter_layout)
         self.dlg_layout.addLayout(self.btn_layout)
         QShortcut('Del', self).activated.connect(self.remove)
         QShortcut('F5', self).activated.connect(self.refresh_list)
         self.open()
         self.refresh_list()
-        hint = self.tree_widget.sizeHintForColumn(0)
-        mwid = int(self.width() / 8 * 5)
-        self.tree_widget.setColumnWidth(0, min(mwid, hint))
-        for col in range(1, self.tree_widget.columnCount()):
-            self.tree_widget.resizeColumnToContents(col)
 
     def accept(self):
-        for item in self.tree_widget.selectedItems():
-            if item.vfile:
-                self.loadfile = item.vfile
+        for idx in self.tree_view.selected_rows():
+            if idx.data(Qt.UserRole):
+                self.loadfile = idx.data(Qt.UserRole)
                 break
         super().accept()
 
+    def done(self, r):
+        # drop the results of a scan still in progress
+        if self.scanner:
+            self.scanner.progress.disconnect()
+            self.scanner.done.disconnect()
+            self.scanner = None
+        super().done(r)
+
     def refresh_list(self):
-        def show_progress(n, tot):
+        # scan in worker thread, keeping the dialog responsive
+        if self.scanner:
+            return
+        self.refresh_button.setEnabled(False)
+        self.prog_tick = 0
+        # parented to the application, the thread may outlive the dialog
+        self.scanner = tScanWorker(self.outdir, QApplication.instance())
+        self.scanner.progress.connect(self.scan_progress)
+        self.scanner.done.connect(self.scan_done)
+        self.scanner.start()
+
+    def scan_progress(self, n, tot):
+        # limit display updates to ten per second
+        now = time.monotonic()
+        if now >= self.prog_tick:
+            self.prog_tick = now + 0.1
             self.tot_label.setText('Scanning %d/%d' % (n, tot))
-            QApplication.processEvents()
-        self.ilist = get_indexfiles(self.outdir, show_progress)
+
+    def scan_done(self, ilist):
+        self.scanner = None
+        self.refresh_button.setEnabled(True)
+        self.ilist = ilist
+        # prepare display strings once, rather than on each redraw
+        for entry in self.ilist:
+            entry['tdir_lc'] = entry['tdir'].lower()
+            entry['size_str'] = hr_size(entry['size'])
+            entry['date_str'] = time.strftime('%Y-%m-%d %H:%M:%S',
+                                    time.localtime(entry['idx']['date']))
+            entry['tooltip'] = ppdict(entry['idx'], ['th'])
         self.redraw_list()
+        if not self.cols_fitted:
+            self.cols_fitted = True
+            hint = self.tree_view.sizeHintForColumn(0)
+            mwid = int(self.width() / 8 * 5)
+            self.tree_view.setColumnWidth(0, min(mwid, hint))
+            for col in range(1, self.tree_view.model().columnCount()):
+                self.tree_view.resizeColumnToContents(col)
         self.filter_edit.setFocus()
 
     def redraw_list(self):
-        selected = [item.text(0) for item in self.tree_widget.selectedItems()]
-        self.tree_widget.setUpdatesEnabled(False)
-        self.tree_widget.clear()
-        ncols = self.tree_widget.columnCount()
+        selected = set(idx.data() for idx in self.tree_view.selected_rows())
+        self.tree_view.setUpdatesEnabled(False)
         total_size = 0
         cnt_broken = 0
         flt = self.filter_edit.text().strip().lower() if self.filter_check.isChecked() else None
+        rows = []
+        sel_rows = []
+        self.broken_rows = []
         for entry in self.ilist:
-            if flt and not flt in entry['tdir'].lower():
+            if flt and not flt in entry['tdir_lc']:
                 continue
             total_size += entry['size']
-            item = QTreeWidgetItem([entry['tdir'], str(entry['idx']['count']), hr_size(entry['size']),
-                                    time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry['idx']['date']))])
-            item.setToolTip(0, ppdict(entry['idx'], ['th']))
-            item.setTextAlignment(1, Qt.AlignRight|Qt.AlignVCenter)
-            item.setTextAlignment(2, Qt.AlignRight|Qt.AlignVCenter)
+            row = [QStandardItem(entry['tdir']), QStandardItem(str(entry['idx']['count'])),
+                   QStandardItem(entry['size_str']), QStandardItem(entry['date_str'])]
+            row[0].setToolTip(entry['tooltip'])
+            row[0].setData(entry['vfile'], Qt.UserRole)
+            row[1].setTextAlignment(Qt.AlignRight|Qt.AlignVCenter)
+            row[2].setTextAlignment(Qt.AlignRight|Qt.AlignVCenter)
             if not entry['idx'] or not entry['vfile']:
                 cnt_broken += 1
-                font = item.font(0)
-                font.setItalic(True)
-                for col in range(ncols):
-                    item.setForeground(col, QColor('red'))
-                    item.setBackground(col, QColor('lightyellow'))
-                    item.setFont(col, font)
-                item.setIcon(0, ffIcon.error)
+                self.broken_rows.append(len(rows))
+                if tmDialog.broken_font is None:
+                    tmDialog.broken_font = row[0].font()
+                    tmDialog.broken_font.setItalic(True)
+                for item in row:
+                    item.setForeground(self.broken_fg)
+                    item.setBackground(self.broken_bg)
+                    item.setFont(self.broken_font)
+                row[0].setIcon(ffIcon.error)
             else:
-                item.setIcon(0, ffIcon.ok)
-            item.vfile = entry['vfile']
-            self.tree_widget.addTopLevelItem(item)
+                row[0].setIcon(ffIcon.ok)
             if entry['tdir'] in selected:
-                item.setSelected(True)
-                selected.remove(entry['tdir'])
+                sel_rows.append(len(rows))
+            rows.append(row)
+        self.tree_view.set_rows(rows)
+        self.tree_view.select_rows(sel_rows)
+        # no selection change is signalled, if none of the rows is selected
+        self.sel_changed()
         self.tot_label.setText('~ ' + hr_size(total_size, 0))
         self.selbroken_button.setEnabled(cnt_broken > 0)
-        self.tree_widget.setUpdatesEnabled(True)
+        self.tree_view.setUpdatesEnabled(True)
 
     def select_broken(self):
-        for i in range(self.tree_widget.topLevelItemCount()):
-            item = self.tree_widget.topLevelItem(i)
-            item.setSelected(not item.vfile)
+        self.tree_view.select_rows(self.broken_rows, QItemSelectionModel.ClearAndSelect)
 
     def sel_changed(self):
-        sel = self.tree_widget.selectedItems()
-        nsel = len(sel)
+        nsel = self.tree_view.nselected
         self.remove_button.setEnabled(nsel > 0)
-        self.load_button.setEnabled(True if nsel==1 and sel[0].vfile else False)
+        if nsel == 1:
+            sel = self.tree_view.selected_rows()
+            self.load_button.setEnabled(bool(sel and sel[0].data(Qt.UserRole)))
+        else:
+            self.load_button.setEnabled(False)
 
     def remove(self):
-        dirs = [sel.text(0) for sel in self.tree_widget.selectedItems()]
+        if self.scanner:
+            return
+        dirs = [idx.data() for idx in self.tree_view.selected_rows()]
         l = len(dirs)
         if l < 1:
             return
@@ -926,7 +1377,7 @@ class tmDialog(QDialog):
                     mbox.setWindowTitle('Directory Removal Failed')
                     mbox.setIcon(QMessageBox.Critical)
                     mbox.setStandardButtons(QMessageBox.Ok)
-                    mbox.setText(re.sub(r'^\[.*\]\s*', '', str(e)).replace(':', ':\n\n', 1))
+                    mbox.setText(_ERRNO_PFX_RE.sub('', str(e)).replace(':', ':\n\n', 1))
                     mbox.exec_()
             self.refresh_list()
 
@@ -1090,15 +1541,17 @@ class cfgDialog(QDialog):
             lines = []
         if '[Default]' not in lines:
             lines = ['[Default]']
+        # locate first assignment for each key in a single pass
+        keyline = {}
+        for i, line in enumerate(lines):
+            m = _CFG_KEY_RE.match(line)
+            if m:
+                keyline.setdefault(m.group(1), i)
         for o in self.opt:
-            found = False
             repl = '%s=%s' % (o[0], str(self.cfg[o[0]]))
-            for i in range(len(lines)):
-                if re.match(r'^\s*%s\s*=' % o[0], lines[i]):
-                    lines[i] = repl
-                    found = True
-                    break
-            if not found:
+            if o[0] in keyline:
+                lines[keyline[o[0]]] = repl
+            else:
                 lines.append(repl)
         lines.append('')
         cont = '\n'.join(lines)
@@ -1118,22 +1571,9 @@ class cfgDialog(QDialog):
             eprint(3, cont)
 
     def apply(self):
-        for i in range(len(self.opt)):
-            o = self.opt[i]
+        for i, o in enumerate(self.opt):
             w = self.table_widget.cellWidget(i, 0)
-            if o[1][0] == 'sfile':
-                self.cfg[o[0]] = w.children()[1].text()
-            elif o[1][0] == 'edit':
-                self.cfg[o[0]] = w.text()
-            elif o[1][0] == 'spin' or o[1][0] == 'dblspin':
-                self.cfg[o[0]] = w.value()
-            elif o[1][0] == 'check':
-                self.cfg[o[0]] = w.isChecked()
-            elif o[1][0] == 'time':
-                t = w.children()[1].time()
-                self.cfg[o[0]] = t.hour()*3600 + t.minute()*60 + t.second() + t.msec()/1000
-            elif o[1][0] == 'mcombo':
-                self.cfg[o[0]] = w.currentText()
+            self.cfg[o[0]] = getattr(self, '_rd_' + o[1][0])(w)
             eprint(3, 'apply:', o[0], '=', self.cfg[o[0]])
         self.cfg['outdir'] = make_outdir(self.cfg['outdir'])
         ffConfig.update(self.cfg)
@@ -1181,59 +1621,95 @@ class cfgDialog(QDialog):
 
     def refresh_view(self):
         self.table_widget.setUpdatesEnabled(False)
-        for i in range(len(self.opt)):
-            o = self.opt[i]
+        for i, o in enumerate(self.opt):
             eprint(3, 'refresh:', o[0], '=', self.cfg[o[0]])
             self.table_widget.setVerticalHeaderItem(i, QTableWidgetItem(o[0]))
             self.table_widget.verticalHeaderItem(i).setToolTip(o[2])
-            if o[1][0] == 'sfile':
-                w = self._fs_browse(self.cfg[o[0]], dironly=o[1][1])
-                w.setToolTip(o[2])
-            elif o[1][0] == 'edit':
-                w = QLineEdit(self.cfg[o[0]])
-                w.setMaxLength(o[1][1])
-                w.setToolTip(o[2])
-                w.textChanged.connect(self.changed)
-            elif o[1][0] == 'spin':
-                w = QSpinBox()
-                w.setRange(o[1][1], o[1][2])
-                w.setValue(int(self.cfg[o[0]]))
-                w.setToolTip(o[2])
-                w.valueChanged.connect(self.changed)
-            elif o[1][0] == 'dblspin':
-                w = QDoubleSpinBox()
-                w.setRange(o[1][1], o[1][2])
-                w.setSingleStep(0.05)
-                w.setDecimals(2)
-                w.setValue(self.cfg[o[0]])
-                w.setToolTip(o[2])
-                w.valueChanged.connect(self.changed)
-            elif o[1][0] == 'check':
-                w = QCheckBox('                          ')
-                w.setTristate(False)
-                w.setCheckState(2 if self.cfg[o[0]] else 0)
-                w.setToolTip(o[2])
-                w.stateChanged.connect(self.changed)
-            elif o[1][0] == 'time':
-                rs = self.cfg[o[0]]
-                s = round(rs, 0)
-                ms = (rs - s) * 1000
-                h = s / 3600
-                s = s % 3600
-                m = s / 60
-                s = s % 60
-                w = self._time_edit(int(h), int(m), int(s), int(ms))
-                w.setToolTip(o[2])
-            elif o[1][0] == 'mcombo':
-                w = QComboBox()
-                w.addItems(['iframe', 'scene', 'skip', 'time', 'customvf'])
-                w.setCurrentIndex(w.findText(self.cfg[o[0]]))
-                w.setToolTip(o[2])
-                w.currentIndexChanged.connect(self.changed)
+            w = getattr(self, '_mk_' + o[1][0])(o[1], self.cfg[o[0]])
+            w.setToolTip(o[2])
             self.table_widget.setCellWidget(i, 0, w)
         self.table_widget.setUpdatesEnabled(True)
         self.reset_button.setEnabled(False)
 
+    # option widget factories, indexed by option type
+    def _mk_sfile(self, ot, val):
+        return self._fs_browse(val, dironly=ot[1])
+
+    def _mk_edit(self, ot, val):
+        w = QLineEdit(val)
+        w.setMaxLength(ot[1])
+        w.textChanged.connect(self.changed)
+        return w
+
+    def _mk_spin(self, ot, val):
+        w = QSpinBox()
+        w.setRange(ot[1], ot[2])
+        w.setValue(int(val))
+        w.valueChanged.connect(self.changed)
+        return w
+
+    def _mk_dblspin(self, ot, val):
+        w = QDoubleSpinBox()
+        w.setRange(ot[1], ot[2])
+        w.setSingleStep(0.05)
+        w.setDecimals(2)
+        w.setValue(val)
+        w.valueChanged.connect(self.changed)
+        return w
+
+    def _mk_check(self, ot, val):
+        w = QCheckBox('                          ')
+        w.setTristate(False)
+        w.setCheckState(2 if val else 0)
+        w.stateChanged.connect(self.changed)
+        return w
+
+    def _mk_time(self, ot, val):
+        s = round(val, 0)
+        ms = (val - s) * 1000
+        h = s / 3600
+        s = s % 3600
+        m = s / 60
+        s = s % 60
+        return self._time_edit(int(h), int(m), int(s), int(ms))
+
+    def _mk_mcombo(self, ot, val):
+        w = QComboBox()
+        w.addItems(['iframe', 'scene', 'skip', 'time', 'customvf'])
+        w.setCurrentIndex(w.findText(val))
+        w.currentIndexChanged.connect(self.changed)
+        return w
+
+    # option value readers, indexed by option type
+    @staticmethod
+    def _rd_sfile(w):
+        return w.children()[1].text()
+
+    @staticmethod
+    def _rd_edit(w):
+        return w.text()
+
+    @staticmethod
+    def _rd_spin(w):
+        return w.value()
+
+    @staticmethod
+    def _rd_dblspin(w):
+        return w.value()
+
+    @staticmethod
+    def _rd_check(w):
+        return w.isChecked()
+
+    @staticmethod
+    def _rd_time(w):
+        t = w.children()[1].time()
+        return t.hour()*3600 + t.minute()*60 + t.second() + t.msec()/1000
+
+    @staticmethod
+    def _rd_mcombo(w):
+        return w.currentText()
+
 
 class batchDialog(QDialog):
     def __init__(self, *args, fnames=[], **kwargs):
@@ -1332,7 +1808,8 @@ class batchDialog(QDialog):
                 self.log_append(' <span style="color:blue;">nothing to do</span>\n')
                 continue
             clear_thumbdir(thdir)
-            thinfo, ok = make_thumbs(fname, thinfo, thdir, self.prog_cb)
+            worker = tWorker(make_thumbs, fname, thinfo, thdir)
+            thinfo, ok = worker.wait_result(self.prog_cb)
             if ok:
                 self.log_append(' <span style="color:green;">ok</span>\n')
             else:
@@ -1359,6 +1836,13 @@ class sMainWindow(QMainWindow):
     thdir = None
     cur = 0
     view_locked = 0
+    stat_tooltip = ''
+    _prog_tick = 0
+    _prog_pct = -1
+    _cursor_pending = 0
+    _cursor_scheduled = False
+    _chrome_cache = {}
+    _dummy_cache = {}
     _dbg_num_tlabels = 0
     _dbg_num_qobjects = 0
 
@@ -1369,7 +1853,6 @@ class sMainWindow(QMainWindow):
 
     def __init__(self, *args, title='', **kwargs):
         super().__init__(*args, **kwargs)
-        ffIcon()
         self.init_window(title)
 
     def closeEvent(self, event):
@@ -1377,6 +1860,22 @@ class sMainWindow(QMainWindow):
             event.accept()
         die(0)
 
+    # status labels share a single tooltip
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.ToolTip and obj in self.statdsp:
+            if self.stat_tooltip:
+                QToolTip.showText(event.globalPos(), self.stat_tooltip, obj)
+            else:
+                QToolTip.hideText()
+                event.ignore()
+            return True
+        return super().eventFilter(obj, event)
+
+    def changeEvent(self, event):
+        if event.type() in (QEvent.StyleChange, QEvent.FontChange):
+            self._chrome_cache.clear()
+        super().changeEvent(event)
+
     # calculate optimal window geometry in ten easy steps
     def optimize_geometry(self):
         if self.windowState() & (Qt.WindowFullScreen | Qt.WindowMaximized):
@@ -1394,12 +1893,19 @@ class sMainWindow(QMainWindow):
         fw = fg.width()
         fh = fg.height()
         eprint(4, 'w', wx, wy, ww, wh, 'f', fx, fy, fw, fh)
-        # calculate overhead WRT to thumbnail viewport
-        scpol = self.scroll.verticalScrollBarPolicy()
-        self.scroll.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOn)
-        ow = ww - self.scroll.viewport().width()
-        oh = wh - self.scroll.viewport().height()
-        self.scroll.setVerticalScrollBarPolicy(scpol)
+        # calculate overhead WRT to thumbnail viewport; this only depends
+        # on style and screen, so avoid the forced relayout if possible
+        ckey = (self.style().metaObject().className(),
+                self.devicePixelRatioF(), self.scroll.frameWidth())
+        if ckey in self._chrome_cache:
+            ow, oh = self._chrome_cache[ckey]
+        else:
+            scpol = self.scroll.verticalScrollBarPolicy()
+            self.scroll.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOn)
+            ow = ww - self.scroll.viewport().width()
+            oh = wh - self.scroll.viewport().height()
+            self.scroll.setVerticalScrollBarPolicy(scpol)
+            self._chrome_cache[ckey] = (ow, oh)
         # grid granularity (i.e. thumbnail label dimension)
         gw = self.tlwidth
         gh = self.tlheight
@@ -1479,16 +1985,13 @@ class sMainWindow(QMainWindow):
             self.cur = 0
             return
         try:
-            self.tlabels[self.cur].setStyleSheet('')
+            self.tlabels[self.cur].set_highlight(False)
             if disable:
                 return
-            bg_hl = self.palette().highlight().color().name()
-            fg_hl = self.palette().highlightedText().color().name()
-            style_hl = 'QLabel {background-color: %s; color: %s;}' % (bg_hl, fg_hl)
             self.cur = min(max(0, self.cur if idx is None else idx), l - 1)
-            self.tlabels[self.cur].setStyleSheet(style_hl)
-            self.statdsp[3].setText('%d / %d' % (self.tlabels[self.cur].info[0], l))
-            self.scroll.ensureWidgetVisible(self.tlabels[self.cur], 0, 0)
+            self.tlabels[self.cur].set_highlight(True)
+            self.statdsp[3].setText('%d / %d' % (self.tlabels[self.cur].info.n, l))
+            self.scroll.ensure_visible(self.cur)
         except:
             pass
 
@@ -1498,9 +2001,26 @@ class sMainWindow(QMainWindow):
         except:
             pass
 
+    # coalesce bursts of moves (e.g. auto-repeat) into a single update
     def move_cursor(self, amnt):
+        self._cursor_pending += amnt
+        if not self._cursor_scheduled:
+            self._cursor_scheduled = True
+            QTimer.singleShot(0, self._flush_cursor)
+
+    def _flush_cursor(self):
+        amnt = self._cursor_pending
+        self._cursor_pending = 0
+        self._cursor_scheduled = False
         self.set_cursor(self.cur + amnt)
 
+    # move cursor by rows, or by pages of rows
+    def move_rows(self, amnt, page=False):
+        amnt *= cfg['grid_columns']
+        if page:
+            amnt *= cfg['grid_rows']
+        self.move_cursor(amnt)
+
     def toggle_fullscreen(self):
         if self.windowState() & Qt.WindowFullScreen:
             self.showNormal()
@@ -1537,44 +2057,82 @@ class sMainWindow(QMainWindow):
         self.show_contextmenu(tlabel, self.mapToGlobal(pos))
 
     def show_contextmenu(self, tlabel, pos):
+        act = self.ctx_actions
+        self._ctx_target = tlabel
         menu = QMenu()
         if not self.view_locked:
             if tlabel:
                 self.set_cursorw(tlabel)
-                menu.addAction('Play From Here', lambda: self._play_video(ts=tlabel.info[2]))
+                menu.addAction(act['play_here'])
             if self.fname:
-                menu.addAction('Play From Start', lambda: self._play_video(ts='0'))
+                menu.addAction(act['play_start'])
             menu.addSeparator()
-            menu.addAction('Open Video File...', lambda: self.load_view(self.vpath))
+            menu.addAction(act['open'])
             if self.fname:
-                menu.addAction('Reload', lambda: self.load_view(self.fname))
-                menu.addAction('Force Rebuild', self.force_rebuild)
+                menu.addAction(act['reload'])
+                menu.addAction(act['rebuild'])
             menu.addSeparator()
             if tlabel or self.fname:
                 copymenu = menu.addMenu('Copy')
                 if tlabel:
-                    copymenu.addAction('Timestamp [H:M:S.ms]', lambda: self.clipboard.setText(s2hms(tlabel.info[2], zerohours=True)))
-                    copymenu.addAction('Timestamp [S.ms]', lambda: self.clipboard.setText(tlabel.info[2]))
+                    copymenu.addAction(act['copy_hms'])
+                    copymenu.addAction(act['copy_ts'])
                 if self.fname:
-                    copymenu.addAction('Original Filename', lambda: self.clipboard.setText(self.fname))
+                    copymenu.addAction(act['copy_fname'])
                 if tlabel:
-                    copymenu.addAction('Thumb Filename', lambda: self.clipboard.setText(os.path.join(self.thdir, tlabel.info[1])))
-                    copymenu.addAction('Thumbnail Image', lambda: self.clipboard.setPixmap(tlabel.layout().itemAt(0).widget().pixmap()))
+                    copymenu.addAction(act['copy_thname'])
+                    copymenu.addAction(act['copy_thumb'])
             menu.addSeparator()
             if not (self.windowState() & (Qt.WindowFullScreen | Qt.WindowMaximized)):
-                menu.addAction('Window Best Fit', self.optimize_geometry)
-            menu.addAction('Thumbnail Manager', lambda: self.manage_thumbs(cfg['outdir']))
-            menu.addAction('Batch Processing', self.batch_dlg)
-            menu.addAction('Preferences', lambda: self.config_dlg())
+                menu.addAction(act['best_fit'])
+            menu.addAction(act['manage'])
+            menu.addAction(act['batch'])
+            menu.addAction(act['prefs'])
         else:
             if proc_running():
-                menu.addAction('Abort Operation', self.abort_build)
+                menu.addAction(act['abort'])
         menu.addSeparator()
-        menu.addAction('Help && About', self.about_dlg)
+        menu.addAction(act['about'])
         menu.addSeparator()
-        menu.addAction('Quit', lambda: self.closeEvent(None))
+        menu.addAction(act['quit'])
         menu.exec_(pos)
 
+    # context menu action slots, these act on the label the menu was
+    # opened for; NOTE: QAction.triggered would pass its 'checked' flag
+    # to any slot that accepts an argument
+    def _ctx_play_here(self):
+        self._play_video(ts=self._ctx_target.info.ts)
+
+    def _ctx_play_start(self):
+        self._play_video(ts='0')
+
+    def _ctx_reload(self):
+        self.load_view(self.fname)
+
+    def _ctx_copy_hms(self):
+        self.clipboard.setText(s2hms(self._ctx_target.info.ts, zerohours=True))
+
+    def _ctx_copy_ts(self):
+        self.clipboard.setText(self._ctx_target.info.ts)
+
+    def _ctx_copy_fname(self):
+        self.clipboard.setText(self.fname)
+
+    def _ctx_copy_thname(self):
+        self.clipboard.setText(os.path.join(self.thdir, self._ctx_target.info.name))
+
+    def _ctx_copy_thumb(self):
+        self.clipboard.setPixmap(self._ctx_target.pixmap)
+
+    def _ctx_quit(self):
+        self.closeEvent(None)
+
+    def open_dlg(self):
+        self.load_view(self.vpath)
+
+    def manage_dlg(self):
+        self.manage_thumbs(cfg['outdir'])
+
     def manage_thumbs(self, outdir):
         if self.view_locked:
             return
@@ -1607,7 +2165,7 @@ class sMainWindow(QMainWindow):
         if ts is None:
             if len(self.tlabels) < 1:
                 return
-            ts = self.tlabels[self.cur].info[2]
+            ts = self.tlabels[self.cur].info.ts
         play_video(self.fname, ts, paused)
 
     # handle various notifications emitted by downstream widgets
@@ -1624,7 +2182,7 @@ class sMainWindow(QMainWindow):
         elif event['type'] == 'play_video':
             self._play_video(ts=event['ts'], paused=event['pause'])
         elif event['type'] == '_dbg_count':
-            self._dbg_num_tlabels = len(self.findChildren(tLabel))
+            self._dbg_num_tlabels = tLabel.instances
             self._dbg_num_qobjects = len(self.findChildren(QObject))
         else:
             eprint(0, 'event not handled: ', event)
@@ -1641,6 +2199,7 @@ class sMainWindow(QMainWindow):
             s = QLabel('')
             s.resize(100, 20)
             s.setStyleSheet('QLabel {margin: 0px 2px 0px 2px;}');
+            s.installEventFilter(self)
             self.statdsp.append(s)
             statbar.addWidget(s)
         self.progbar = QProgressBar()
@@ -1665,64 +2224,120 @@ class sMainWindow(QMainWindow):
         main_layout.addLayout(statbar)
         self.setCentralWidget(main_frame)
         # register shotcuts
-        QShortcut('Esc', self).activated.connect(self.esc_action)
-        QShortcut('Ctrl+Q', self).activated.connect(lambda: self.closeEvent(None))
-        QShortcut('Ctrl+W', self).activated.connect(lambda: self.closeEvent(None))
-        QShortcut('F', self).activated.connect(self.toggle_fullscreen)
-        QShortcut('Alt+Return', self).activated.connect(self.toggle_fullscreen)
-        QShortcut('Ctrl+G', self).activated.connect(self.optimize_geometry)
-        QShortcut('Ctrl+O', self).activated.connect(lambda: self.load_view(self.vpath))
-        QShortcut('Ctrl+M', self).activated.connect(lambda: self.manage_thumbs(cfg['outdir']))
-        QShortcut('Tab', self).activated.connect(lambda: self.move_cursor(1))
-        QShortcut('Shift+Tab', self).activated.connect(lambda: self.move_cursor(-1))
-        QShortcut('Right', self).activated.connect(lambda: self.move_cursor(1))
-        QShortcut('Left', self).activated.connect(lambda: self.move_cursor(-1))
-        QShortcut('Up', self).activated.connect(lambda: self.move_cursor(-cfg['grid_columns']))
-        QShortcut('Down', self).activated.connect(lambda: self.move_cursor(cfg['grid_columns']))
-        QShortcut('PgUp', self).activated.connect(lambda: self.move_cursor(-cfg['grid_rows'] * cfg['grid_columns']))
-        QShortcut('PgDown', self).activated.connect(lambda: self.move_cursor(cfg['grid_rows'] * cfg['grid_columns']))
-        QShortcut('Home', self).activated.connect(lambda: self.set_cursor(0))
-        QShortcut('End', self).activated.connect(lambda: self.set_cursor(len(self.tlabels)-1))
-        QShortcut('Space', self).activated.connect(lambda: self._play_video(paused=True))
-        QShortcut('Return', self).activated.connect(lambda: self._play_video(paused=True))
-        QShortcut('Shift+Return', self).activated.connect(lambda: self._play_video())
-        QShortcut('Ctrl+Return', self).activated.connect(lambda: self.contextMenuEvent(None))
-        QShortcut('Ctrl+Alt+P', self).activated.connect(self.config_dlg)
-        QShortcut('Alt+H', self).activated.connect(self.about_dlg)
-        QShortcut('Ctrl+B', self).activated.connect(self.batch_dlg)
-
-
+        for key, slot in (
+                ('Esc', self.esc_action),
+                ('Ctrl+Q', partial(self.closeEvent, None)),
+                ('Ctrl+W', partial(self.closeEvent, None)),
+                ('F', self.toggle_fullscreen),
+                ('Alt+Return', self.toggle_fullscreen),
+                ('Ctrl+G', self.optimize_geometry),
+                ('Ctrl+O', self.open_dlg),
+                ('Ctrl+M', self.manage_dlg),
+                ('Tab', partial(self.move_cursor, 1)),
+                ('Shift+Tab', partial(self.move_cursor, -1)),
+                ('Right', partial(self.move_cursor, 1)),
+                ('Left', partial(self.move_cursor, -1)),
+                ('Up', partial(self.move_rows, -1)),
+                ('Down', partial(self.move_rows, 1)),
+                ('PgUp', partial(self.move_rows, -1, page=True)),
+                ('PgDown', partial(self.move_rows, 1, page=True)),
+                ('Home', partial(self.set_cursor, 0)),
+                ('End', partial(self.set_cursor, sys.maxsize)),
+                ('Space', partial(self._play_video, paused=True)),
+                ('Return', partial(self._play_video, paused=True)),
+                ('Shift+Return', self._play_video),
+                ('Ctrl+Return', partial(self.contextMenuEvent, None)),
+                ('Ctrl+Alt+P', self.config_dlg),
+                ('Alt+H', self.about_dlg),
+                ('Ctrl+B', self.batch_dlg)):
+            QShortcut(key, self, activated=slot)
+        # set up context menu actions, once
+        self._ctx_target = None
+        self.ctx_actions = {}
+        for name, text, slot in (
+                ('play_here', 'Play From Here', self._ctx_play_here),
+                ('play_start', 'Play From Start', self._ctx_play_start),
+                ('open', 'Open Video File...', self.open_dlg),
+                ('reload', 'Reload', self._ctx_reload),
+                ('rebuild', 'Force Rebuild', self.force_rebuild),
+                ('copy_hms', 'Timestamp [H:M:S.ms]', self._ctx_copy_hms),
+                ('copy_ts', 'Timestamp [S.ms]', self._ctx_copy_ts),
+                ('copy_fname', 'Original Filename', self._ctx_copy_fname),
+                ('copy_thname', 'Thumb Filename', self._ctx_copy_thname),
+                ('copy_thumb', 'Thumbnail Image', self._ctx_copy_thumb),
+                ('best_fit', 'Window Best Fit', self.optimize_geometry),
+                ('manage', 'Thumbnail Manager', self.manage_dlg),
+                ('batch', 'Batch Processing', self.batch_dlg),
+                ('prefs', 'Preferences', self.config_dlg),
+                ('abort', 'Abort Operation', self.abort_build),
+                ('about', 'Help && About', self.about_dlg),
+                ('quit', 'Quit', self._ctx_quit)):
+            self.ctx_actions[name] = QAction(text, self, triggered=slot)
+
+
+    # throttled to visible changes, at most ~60 updates per second; with
+    # the progress bar hidden only start and end are shown
     def show_progress(self, n, tot):
+        if 0 < n < tot and self.progbar.isHidden():
+            return
+        pct = int(n * 100 / max(0.01, tot))
+        now = time.monotonic()
+        if n < tot and (pct == self._prog_pct or now < self._prog_tick):
+            return
+        self._prog_tick = now + 0.016
+        self._prog_pct = pct
         self.statdsp[1].setText('%d / %d' % (n, tot))
-        self.progbar.setValue(int(n * 100 / max(0.01, tot)))
-        QApplication.processEvents()
-
-    # generate clickable thumbnail labels
-    def make_tlabels(self, tlabels):
-        dummy_thumb = ffIcon.broken_pxm.scaledToWidth(cfg['thumb_width'])
+        self.progbar.setValue(pct)
+        QApplication.processEvents(QEventLoop.ExcludeUserInputEvents)
+
+    # generate clickable thumbnail labels; pass an already parsed index
+    # to avoid reading and decoding the index file once more; a header
+    # only index is completed from file
+    def make_tlabels(self, tlabels, idx=None):
+        # placeholder for missing thumbnails, scaled once per width
+        dummy_thumb = self._dummy_cache.get(cfg['thumb_width'])
+        if dummy_thumb is None:
+            dummy_thumb = ffIcon.broken_pxm.scaledToWidth(cfg['thumb_width'],
+                                                          Qt.SmoothTransformation)
+            self._dummy_cache[cfg['thumb_width']] = dummy_thumb
         tlabels.clear()
         try:
-            with open(os.path.join(self.thdir, _FFPREVIEW_IDX), 'r') as idxfile:
-                idx = json.load(idxfile)
-                if cfg['verbosity'] > 3:
-                    eprint(4, 'idx =', json.dumps(idx, indent=2))
-                self.show_progress(0, idx['count'])
-                for th in idx['th']:
-                    if th[0] % 100 == 0:
-                        self.show_progress(th[0], idx['count'])
-                    thumb = QPixmap(os.path.join(self.thdir, th[1]))
-                    if thumb.isNull():
-                        thumb = dummy_thumb
-                    tlabel = tLabel(pixmap=thumb, text=s2hms(th[2]),
-                                    info=th, receptor=self.notify_receive)
-                    tlabels.append(tlabel)
+            if idx is None or 'th' not in idx:
+                idx = read_idxfile(self.thdir)
+            if cfg['verbosity'] > 3:
+                eprint(4, 'idx =', json.dumps(idx, indent=2))
+            self.show_progress(0, idx['count'])
+            # compact tuples replace the decoded JSON lists for good
+            idx['th'] = [tInfo(*th) for th in idx['th']]
+            thumbs = thumb_pixmaps([os.path.join(self.thdir, th.name) for th in idx['th']],
+                                   idx.get('date', 0), self.show_progress)
+            # compute one label size for all thumbnails and placeholders
+            # alike: fit the larger of both pixmaps, and a caption with
+            # all digits zeroed, as wide as the longest time stamp
+            psize = dummy_thumb.size()
+            for thumb in thumbs:
+                if not thumb.isNull():
+                    psize = psize.expandedTo(thumb.size())
+                    break
+            tmax = max(0, float(idx.get('duration', 0)))
+            if idx['th']:
+                tmax = max(tmax, float(idx['th'][-1].ts))
+            tl_size = tLabel.precompute_size(psize, self.scroll.fontMetrics(),
+                                             re.sub(r'\d', '0', s2hms(tmax)))
+            for th, thumb in zip(idx['th'], thumbs):
+                if th.n % 100 == 0:
+                    self.show_progress(th.n, idx['count'])
+                if thumb.isNull():
+                    thumb = dummy_thumb
+                tlabel = self.scroll.get_tlabel(thumb, s2hms(th.ts), th,
+                                                self.notify_receive, tl_size)
+                tlabels.append(tlabel)
         except Exception as e:
             eprint(0, str(e))
         if len(tlabels) == 0:
             # no thumbnails available, make a dummy
-            tlabels.append(tLabel(pixmap=dummy_thumb, text=s2hms(str(cfg['start'])),
-                            info=[0, 'broken', str(cfg['start'])],
-                            receptor=self.notify_receive))
+            tlabels.append(self.scroll.get_tlabel(dummy_thumb, s2hms(str(cfg['start'])),
+                            tInfo(0, 'broken', str(cfg['start'])), self.notify_receive))
 
     def abort_build(self):
         mbox = QMessageBox(self)
@@ -1792,7 +2407,7 @@ class sMainWindow(QMainWindow):
         # clear previous view
         for sd in self.statdsp:
             sd.setText('')
-            sd.setToolTip('')
+        self.stat_tooltip = ''
         self.statdsp[0].setText('Clearing view')
         QApplication.processEvents()
         self.clear_view()
@@ -1801,7 +2416,7 @@ class sMainWindow(QMainWindow):
         QApplication.processEvents()
         if self.thinfo:
             self.thinfo.clear()
-        self.thinfo, ok = get_thinfo(self.fname, self.thdir)
+        self.thinfo, ok = get_thinfo(self.fname, self.thdir, full=True)
         if self.thinfo is None:
             self.statdsp[0].setText('Unrecognized file format')
             self.lock_view(False)
@@ -1811,18 +2426,18 @@ class sMainWindow(QMainWindow):
             self.statdsp[0].setText('Processing')
             clear_thumbdir(self.thdir)
             self.progbar.show()
-            self.thinfo, ok = make_thumbs(fname, self.thinfo, self.thdir, self.show_progress)
+            worker = tWorker(make_thumbs, fname, self.thinfo, self.thdir)
+            self.thinfo, ok = worker.wait_result(self.show_progress)
         # load thumbnails and make labels
         self.statdsp[0].setText('Loading')
         self.progbar.show()
-        self.make_tlabels(self.tlabels)
+        # on success thinfo is identical to the saved index
+        self.make_tlabels(self.tlabels, self.thinfo if ok else None)
         self.tlwidth = self.tlabels[0].width()
         self.tlheight = self.tlabels[0].height()
         # build thumbnail view
-        tooltip = ppdict(self.thinfo, ['th'])
-        for sd in self.statdsp:
-            self.statdsp[2].setText('')
-            sd.setToolTip(tooltip)
+        self.stat_tooltip = ppdict(self.thinfo, ['th'])
+        self.statdsp[2].setText('')
         self.statdsp[0].setText('Building view')
         QApplication.processEvents()
         self.rebuild_view()
@@ -1842,7 +2457,7 @@ class sMainWindow(QMainWindow):
 ############################################################
 # Helper functions
 
-def proc_cmd(cmd):
+def proc_cmd(cmd, decode=True):
     if proc_running():
         return '', '', None
     global proc
@@ -1850,51 +2465,64 @@ def proc_cmd(cmd):
     stdout = stderr = ''
     try:
         eprint(1, 'run:', cmd)
-        proc = Popen(cmd, shell=False, stdout=PIPE, stderr=PIPE, env=cfg['env'])
+        proc = start_proc(cmd)
         stdout, stderr = proc.communicate()
-        stdout = stdout.decode()
-        stderr = stderr.decode()
+        if decode:
+            stdout = stdout.decode()
+            stderr = stderr.decode()
         retval = proc.wait()
         proc = None
         if retval != 0:
             eprint(0, cmd, '\n  returned %d' % retval)
-            eprint(2, stderr)
+            eprint(2, stderr if decode else stderr.decode(errors='replace'))
     except Exception as e:
         eprint(0, cmd, '\n  failed:', str(e))
         proc = kill_proc(proc)
     return stdout, stderr, retval
 
+# run ffprobe and parse its JSON output; the parser takes raw bytes
+def probe_json(cmd):
+    out, err, rc = proc_cmd(cmd, decode=False)
+    if rc != 0:
+        return None
+    try:
+        return json_loads(out)
+    except ValueError as e:
+        eprint(0, cmd, '\n  returned malformed JSON:', str(e))
+    return None
+
 # get video meta information
 def get_meta(vidfile):
     meta = { 'frames': -1, 'duration':-1, 'fps':-1.0, 'nsubs': -1 }
     if proc_running():
         return meta, False
-    # count subtitle streams
-    cmd = [cfg['ffprobe'], '-v', 'error', '-select_streams', 's',
-           '-show_entries', 'stream=index', '-of', 'csv=p=0', vidfile]
-    out, err, rc = proc_cmd(cmd)
-    if rc == 0:
-        meta['nsubs'] = len(out.splitlines())
+    # try ffprobe fast method, which gets the subtitle stream count and
+    # frames / duration / fps in one go; only query the entries actually
+    # evaluated, full stream and format info can produce a lot of JSON
+    cmd = [cfg['ffprobe'], '-v', 'error', '-show_entries',
+           'stream=codec_type,duration,nb_frames,avg_frame_rate:format=duration',
+           '-of', 'json', vidfile]
+    info = probe_json(cmd)
+    vstreams = []
+    if info is not None:
+        streams = info.get('streams', [])
+        vstreams = [st for st in streams if st.get('codec_type') == 'video']
+        meta['nsubs'] = sum(st.get('codec_type') == 'subtitle' for st in streams)
         eprint(1, 'number of subtitle streams:', meta['nsubs'])
     else: # ffprobe failed, try using ffmpeg
         cmd = [cfg['ffmpeg'], '-i', vidfile]
         out, err, rc = proc_cmd(cmd)
         nsubs = 0
         for line in io.StringIO(err).readlines():
-            if re.match(r'\s*Stream #.*: Subtitle:', line):
+            if _SUBS_STREAM_RE.match(line):
                 nsubs += 1
         if nsubs > 0:
             meta['nsubs'] = nsubs
             eprint(1, 'number of subtitle streams:', meta['nsubs'])
-    # get frames / duration / fps
-    # try ffprobe fast method
-    cmd = [cfg['ffprobe'], '-v', 'error', '-select_streams', 'v:0',
-           '-show_streams', '-show_format', '-of', 'json', vidfile]
-    out, err, rc = proc_cmd(cmd)
-    if rc == 0:
-        info = json.loads(out)
-        strinf = info['streams'][0]
-        fmtinf = info['format']
+    # get frames / duration / fps from first video stream
+    if vstreams:
+        strinf = vstreams[0]
+        fmtinf = info.get('format', {})
         d = f = None
         fps = -1
         if 'duration' in strinf:
@@ -1918,9 +2546,8 @@ def get_meta(vidfile):
     # no dice, try ffprobe slow method
     cmd = [cfg['ffprobe'], '-v', 'error', '-select_streams', 'v:0', '-of', 'json', '-count_packets',
            '-show_entries', 'format=duration:stream=nb_read_packets', vidfile]
-    out, err, rc = proc_cmd(cmd)
-    if rc == 0:
-        info = json.loads(out)
+    info = probe_json(cmd)
+    if info:
         meta['frames'] = int(info['streams'][0]['nb_read_packets'])
         d = float(info['format']['duration'])
         meta['duration'] = max(d, 0.0001)
@@ -1933,7 +2560,7 @@ def get_meta(vidfile):
     out, err, rc = proc_cmd(cmd)
     if rc == 0:
         for line in io.StringIO(err).readlines():
-            m = re.match(r'^frame=\s*(\d+).*time=\s*(\d+:\d+:\d+(\.\d+)?)', line)
+            m = _FRAME_TIME_RE.match(line)
             if m:
                 meta['frames'] = int(m.group(1))
                 d = hms2s(m.group(2))
@@ -1964,58 +2591,84 @@ def extract_subs(vidfile, thinfo):
         eprint(0, str(e))
     return None
 
+# build frame selection filter for the requested method
+def build_select_expr(method):
+    if method == 'scene':
+        return r'select=gt(scene\,' + str(cfg['scene_thresh']) + ')'
+    elif method == 'skip':
+        return r'select=not(mod(n\,' + str(cfg['frame_skip']) + '))'
+    elif method == 'time':
+        # select by timestamp distance rather than frame count, so
+        # variable frame rate input is sampled at the proper interval
+        return (r'select=isnan(prev_selected_t)+gte(t-prev_selected_t\,'
+                + str(cfg['time_skip']) + ')')
+    elif method == 'customvf':
+        return cfg['customvf']
+    # iframe
+    return r'select=eq(pict_type\,I)'
+
 # extract thumbnails from video and collect timestamps
-def make_thumbs(vidfile, thinfo, thdir, prog_cb=None):
+def make_thumbs(vidfile, thinfo, thdir, prog_cb=None, threads=0):
     # prepare command line
     pictemplate = '%08d.png'
     cmd = [cfg['ffmpeg'], '-loglevel', 'info', '-hide_banner', '-y']
+    if threads:
+        cmd.extend( ['-threads', str(threads)] )
     if cfg['start']:
         cmd.extend( ['-ss', str(cfg['start'])] )
     if cfg['end']:
         cmd.extend( ['-to', str(cfg['end'])] )
     cmd.extend( ['-i', vidfile] )
     # prepare filters
-    if cfg['method'] == 'scene':
-        flt = 'select=gt(scene\,' + str(cfg['scene_thresh']) + ')'
-    elif cfg['method'] == 'skip':
-        flt = 'select=not(mod(n\,' + str(cfg['frame_skip']) + '))'
-    elif cfg['method'] == 'time':
-        fs = int(float(cfg['time_skip']) * float(thinfo['fps']))
-        flt = 'select=not(mod(n\,' + str(fs) + '))'
-    elif cfg['method'] == 'customvf':
-        flt = cfg['customvf']
-    else: # iframe
-        flt = 'select=eq(pict_type\,I)'
-    flt += ',showinfo,scale=' + str(cfg['thumb_width']) + ':-1'
+    flt = build_select_expr(cfg['method'])
+    flt += ',showinfo,scale=' + str(cfg['thumb_width']) + ':-1:flags=fast_bilinear'
     # dump subtitles and add to filter
     subs_file = None
     if thinfo['addss'] >= 0:
         subs_file = extract_subs(vidfile, thinfo)
         if subs_file:
-            # escape windows path; unix temp file name should be fine?
-            sf = subs_file.replace('\\', r'\\\\').replace(':', r'\\:')
+            sf = subs_file.translate(_FLT_PATH_ESC)
             flt += ',subtitles=' + sf + ':si=' + str(thinfo['addss'])
-    # finalize command line
-    cmd.extend( ['-vf', flt, '-vsync', 'vfr', os.path.join(thdir, pictemplate)] )
+    # finalize command line; use a fast zlib level for the small thumbnail
+    # images, which encodes noticeably faster at only slightly larger size
+    cmd.extend( ['-vf', flt, '-vsync', 'vfr', '-compression_level', '3'] )
+    if threads:
+        cmd.extend( ['-threads', str(threads), '-filter_threads', str(threads)] )
+    cmd.append(os.path.join(thdir, pictemplate))
     # generate thumbnail images from video
     rc = False
     if proc_running():
         return thinfo, rc
     global proc
-    ebuf = ''
+    # keep only the tail of the ffmpeg log, for error reporting
+    ebuf = deque()
+    ebuf_len = 0
     cnt = 0
     eprint(1, 'run:', cmd)
     try:
-        proc = Popen(cmd, shell=False, stderr=PIPE, env=cfg['env'])
-        while proc.poll() is None:
-            line = proc.stderr.readline()
-            if line:
-                line = line.decode()
-                ebuf += line
-                x = re.search(r'pts_time:\d*\.?\d*', line)
+        proc = start_proc(cmd, stdout=None)
+        # read output in whole chunks, as available, until ffmpeg closes
+        # the pipe; a trailing incomplete line is held over to the next read
+        fd = proc.stderr.fileno()
+        buf = b''
+        while buf is not None:
+            data = os.read(fd, 65536)
+            if data:
+                lines = (buf + data).splitlines(True)
+                buf = lines.pop() if not lines[-1].endswith((b'\n', b'\r')) else b''
+            else:
+                lines = [buf]
+                buf = None
+            for line in lines:
+                ebuf.append(line)
+                ebuf_len += len(line)
+                while ebuf_len > 65536 and len(ebuf) > 1:
+                    ebuf_len -= len(ebuf.popleft())
+                # match raw bytes, only the timestamp needs decoding
+                x = _PTS_TIME_RE.search(line)
                 if x is not None:
                     cnt += 1
-                    t = x.group().split(':')[1]
+                    t = x.group(1).decode()
                     if cfg['start']:
                         t = str(float(t) + cfg['start'])
                     thinfo['th'].append([ cnt, pictemplate % cnt, t ])
@@ -2025,11 +2678,11 @@ def make_thumbs(vidfile, thinfo, thdir, prog_cb=None):
         proc = None
         if retval != 0:
             eprint(0, cmd, '\n  returned %d' % retval)
-            eprint(2, ebuf)
+            if cfg['verbosity'] > 1:
+                eprint(2, b''.join(ebuf).decode(errors='replace'))
         thinfo['count'] = cnt
-        with open(os.path.join(thdir, _FFPREVIEW_IDX), 'w') as idxfile:
-            thinfo['date'] = int(time.time())
-            json.dump(thinfo, idxfile, indent=2)
+        thinfo['date'] = int(time.time())
+        write_idxfile(thdir, thinfo)
         rc = (retval == 0)
     except Exception as e:
         eprint(0, cmd, '\n  failed:', str(e))
@@ -2057,105 +2710,96 @@ def play_video(filename, start='0', paused=False):
         return
 
     # Linux; Darwin?
-    # double fork to avoid accumulating zombie processes
-    try:
-        pid = os.fork()
-        if pid > 0:
-            eprint(3, '1st fork ok')
-            status = os.waitid(os.P_PID, pid, os.WEXITED)
-            if status.si_status:
-                eprint(0, 'child exit error:', status)
-            else:
-                eprint(3, 'child exit ok')
-            return  # parent: back to business
-    except Exception as e:
-        eprint(0, '1st fork failed:', str(e))
-        return
-    # child
-    # become session leader and fork a second time
-    os.setsid()
-    try:
-        pid = os.fork()
-        if pid > 0:
-            eprint(3, '2nd fork ok')
-            os._exit(0) # child done
-    except Exception as e:
-        eprint(0, '2nd fork failed:', str(e))
-        os._exit(1)
-    # grandchild
-    # restore default signal handlers
-    signal.signal(signal.SIGINT, signal.SIG_DFL)
-    signal.signal(signal.SIGTERM, signal.SIG_DFL)
-    signal.signal(signal.SIGHUP, signal.SIG_DFL)
-    signal.signal(signal.SIGQUIT, signal.SIG_DFL)
-    signal.signal(signal.SIGPIPE, signal.SIG_DFL)
     # prepare argument vector
     cmd = cfg['plpaused'] if paused and cfg['plpaused'] else cfg['player']
     args = shlex.split(cmd)
     for i in range(len(args)):
         args[i] = args[i].replace('%t', start).replace('%f', filename)
     eprint(1, 'run:', args)
-    # close all fds and redirect stdin, stdout and stderr to /dev/null
-    sys.stdout.flush()
-    sys.stderr.flush()
-    for fd in range(1024):  # more than enough for us
-        try:
-            os.close(fd)
-        except:
-            pass
-    os.open(os.devnull, os.O_RDWR)
-    os.dup2(0, 1)
-    os.dup2(0, 2)
-    # execute command
-    os.execvpe(args[0], args, cfg['env'])
-    os._exit(255)
+    # start player detached in its own session; subprocess takes care of
+    # closing fds and restoring signals, and reaps the exited player on
+    # one of the next launches
+    try:
+        Popen(args, shell=False, stdin=DEVNULL, stdout=DEVNULL, stderr=DEVNULL,
+                env=cfg['env'], start_new_session=True, close_fds=True)
+    except Exception as e:
+        eprint(0, args, '\n  failed:', str(e))
 
 
-# check validity of existing index file
-def chk_idxfile(thinfo, thdir):
+# write index file: header object on the first line, followed by one
+# thumbnail entry per line; the file is replaced atomically, so readers
+# never get to see a partially written index
+def write_idxfile(thdir, thinfo):
+    idxpath = os.path.join(thdir, _FFPREVIEW_IDX)
+    tmppath = idxpath + '.tmp'
+    hdr = {k: v for k, v in thinfo.items() if k != 'th'}
+    data = b'\n'.join([json_dumps(hdr, indent=False)]
+                      + [json_dumps(th, indent=False) for th in thinfo['th']])
+    with open(tmppath, 'wb') as idxfile:
+        idxfile.write(data + b'\n')
+    os.replace(tmppath, idxpath)
+
+# read index file; with header_only set, the thumbnail entries are not
+# read, unless the file is in the old single JSON document format; a
+# full read fails with ValueError, if entries are missing
+def read_idxfile(thdir, header_only=False):
+    with open(os.path.join(thdir, _FFPREVIEW_IDX), 'rb') as idxfile:
+        line = idxfile.readline()
+        try:
+            idx = json_loads(line)
+        except ValueError:
+            idx = json_loads(line + idxfile.read())
+        else:
+            if header_only:
+                return idx
+            idx['th'] = [json_loads(l) for l in idxfile.read().splitlines()
+                                    if l and not l.isspace()]
+    if len(idx['th']) != idx['count']:
+        raise ValueError('index holds %d of %d thumbnail entries'
+                         % (len(idx['th']), idx['count']))
+    return idx
+
+# method specific parameters recorded in the index
+_METHOD_KEYS = {
+    'skip': ('frame_skip',),
+    'time': ('time_skip',),
+    'scene': ('scene_thresh',),
+    'customvf': ('customvf',),
+}
+
+# check validity of existing index file; with full set, the thumbnail
+# entries are read as well, else the header alone is checked
+def chk_idxfile(thinfo, thdir, full=False):
     idxpath = os.path.join(thdir, _FFPREVIEW_IDX)
     try:
-        with open(idxpath, 'r') as idxfile:
-            idx = json.load(idxfile)
-            if idx['name'] != thinfo['name']:
-                return False
-            if int(idx['duration']) != int(thinfo['duration']):
-                return False
-            if idx['start'] != thinfo['start']:
-                return False
-            if idx['end'] != thinfo['end']:
-                return False
-            if idx['count'] != len(idx['th']):
+        idx = read_idxfile(thdir, header_only=True)
+        if int(idx['duration']) != int(thinfo['duration']):
+            return False
+        if 'th' in idx and idx['count'] != len(idx['th']):
+            return False
+        keys = ('name', 'start', 'end')
+        if not cfg['reuse']:
+            keys += ('method', 'width', 'nsubs', 'addss') \
+                    + _METHOD_KEYS.get(thinfo['method'], ())
+        for k in keys:
+            if idx.get(k) != thinfo.get(k):
                 return False
-            if not cfg['reuse']:
-                if idx['width'] != thinfo['width']:
-                    return False
-                if idx['nsubs'] != thinfo['nsubs']:
-                    return False
-                if idx['addss'] != thinfo['addss']:
-                    return False
-                if idx['method'] != thinfo['method']:
-                    return False
-                if idx['method'] == 'skip':
-                    if not 'frame_skip' in idx or idx['frame_skip'] != thinfo['frame_skip']:
-                        return False
-                elif idx['method'] == 'time':
-                    if not 'time_skip' in idx or idx['time_skip'] != thinfo['time_skip']:
-                        return False
-                elif idx['method'] == 'scene':
-                    if not 'scene_thresh' in idx or idx['scene_thresh'] != thinfo['scene_thresh']:
-                        return False
-                elif idx['method'] == 'customvf':
-                    if not 'customvf' in idx or idx['customvf'] != thinfo['customvf']:
-                        return False
-            return idx
+        if 'th' in idx:
+            # convert old style index, so later scans only read the header
+            try:
+                write_idxfile(thdir, idx)
+            except OSError as e:
+                eprint(1, idxpath, str(e))
+        elif full:
+            idx = read_idxfile(thdir)
+        return idx
     except Exception as e:
         eprint(1, idxpath, str(e))
         pass
     return False
 
 # initialize thumbnail info structure
-def get_thinfo(vfile, thdir):
+def get_thinfo(vfile, thdir, full=False):
     thinfo = {
         'name': os.path.basename(vfile),
         'path': os.path.dirname(vfile),
@@ -2170,14 +2814,8 @@ def get_thinfo(vfile, thdir):
         'method': cfg['method'],
     }
     # include method specific parameters (only)
-    if cfg['method'] == 'scene':
-        thinfo['scene_thresh'] = cfg['scene_thresh']
-    elif cfg['method'] == 'skip':
-        thinfo['frame_skip'] = cfg['frame_skip']
-    elif cfg['method'] == 'time':
-        thinfo['time_skip'] = cfg['time_skip']
-    elif cfg['method'] == 'customvf':
-        thinfo['customvf'] = cfg['customvf']
+    for k in _METHOD_KEYS.get(cfg['method'], ()):
+        thinfo[k] = cfg[k]
     # set these here for neater ordering
     thinfo['addss'] = cfg['addss']
     thinfo['ffpreview'] = _FFPREVIEW_VERSION
@@ -2191,7 +2829,7 @@ def get_thinfo(vfile, thdir):
     if thinfo['addss'] >= thinfo['nsubs']:
         thinfo['addss'] = -1
     if not cfg['force']:
-        chk = chk_idxfile(thinfo, thdir)
+        chk = chk_idxfile(thinfo, thdir, full)
         if chk:
             return chk, True
     return thinfo, False
@@ -2216,106 +2854,186 @@ def clear_thumbdir(thdir):
         return False
     # prepare thumbnail directory
     eprint(2, 'clearing out %s' % thdir)
+    # the parent is the output directory, which already exists
     try:
-        os.makedirs(thdir, exist_ok=True)
+        os.mkdir(thdir)
+    except FileExistsError as e:
+        if not os.path.isdir(thdir):
+            eprint(0, str(e))
+            return False
     except Exception as e:
         eprint(0, str(e))
         return False
-    f = os.path.join(thdir, _FFPREVIEW_IDX)
-    if os.path.exists(f):
+    # unlink relative to a directory fd, where the platform supports it
+    dfd = None
+    if os.unlink in os.supports_dir_fd:
         try:
-            os.unlink(f)
+            dfd = os.open(thdir, os.O_RDONLY | os.O_DIRECTORY)
         except Exception as e:
             eprint(0, str(e))
-            pass
-    for f in os.listdir(thdir):
-        if re.match(r'^\d{8}\.png$', f):
-            try:
-                os.unlink(os.path.join(thdir, f))
-            except Exception as e:
-                eprint(0, str(e))
-                pass
+            return False
+    try:
+        with os.scandir(thdir) as it:
+            for de in it:
+                if de.name == _FFPREVIEW_IDX or is_thumb_name(de.name):
+                    try:
+                        os.unlink(de.path if dfd is None else de.name, dir_fd=dfd)
+                    except Exception as e:
+                        eprint(0, str(e))
+                        pass
+    finally:
+        if dfd is not None:
+            os.close(dfd)
+
+# iterate over video files in a directory, selected by file extension
+def iter_videos(path, vset):
+    with os.scandir(path) as it:
+        for e in it:
+            if e.is_file() and os.path.splitext(e.name)[1].lower() in vset:
+                yield e.path
 
 # process a single file in console-only mode
-def batch_process(fname):
+def batch_process(fname, progress=True, threads=0):
     def cons_progress(n, tot):
         print('\r%4d / %4d' % (int(n), int(tot)), end='', file=sys.stderr)
         if tot > 0:
             print(' %3d %%' % int(n * 100 / tot), end='', file=sys.stderr)
 
+    def cons_print(*args, **kwargs):
+        if progress:
+            print(*args, file=sys.stderr, **kwargs)
+
     # sanitize file name
-    if not os.path.exists(fname) or not os.access(fname, os.R_OK):
+    try:
+        st = os.stat(fname)
+    except OSError:
+        st = None
+    if st is None or not os.access(fname, os.R_OK):
         eprint(0, '%s: no permission' % fname)
         return False
-    if os.path.isdir(fname):
+    if stat.S_ISDIR(st.st_mode):
         eprint(0, '%s is a directory!' % fname)
         return False
     fname = os.path.abspath(fname)
     vfile = os.path.basename(fname)
     thdir = os.path.join(cfg['outdir'], vfile)
     # analyze video
-    print('Analyzing  %s ...\r' % vfile, end='', file=sys.stderr)
+    cons_print('Analyzing  %s ...\r' % vfile, end='')
     thinfo, ok = get_thinfo(fname, thdir)
     if thinfo is None:
-        print('\nFailed.', file=sys.stderr)
-        return False
+        ok = False
     # prepare info and thumbnail files
-    if not ok:
+    elif not ok:
         # (re)generate thumbnails and index file
-        print('Processing', file=sys.stderr)
+        cons_print('Processing')
         clear_thumbdir(thdir)
-        thinfo, ok = make_thumbs(fname, thinfo, thdir, cons_progress)
-        print('\r                                  \r', end='', file=sys.stderr)
+        thinfo, ok = make_thumbs(fname, thinfo, thdir,
+                                 cons_progress if progress else None, threads)
+        cons_print('\r                                  \r', end='')
     else:
-        print('', file=sys.stderr)
-    if ok:
-        print('Ok.        ', file=sys.stderr)
+        cons_print('')
+    if progress:
+        print('Ok.        ' if ok else 'Failed.    ', file=sys.stderr)
     else:
-        print('Failed.    ', file=sys.stderr)
+        print('%s: %s' % (vfile, 'Ok.' if ok else 'Failed.'), file=sys.stderr)
     return ok
 
+# set up a batch mode worker process
+def batch_init(wcfg):
+    global proc, cfg
+    # let the parent handle termination
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    proc = None
+    cfg = wcfg
+
+# process a single file in a batch mode worker process
+def batch_worker(fname):
+    # files are already processed in parallel, keep ffmpeg single-threaded
+    return batch_process(fname, progress=False, threads=1)
+
+# scan results per (parent, name) of thumbnail directories, valid for as
+# long as the directory mtime and the index file mtime and size stay the
+# same; limited to _THUMBDIR_CACHE_MAX entries
+_thumbdir_cache = {}
+_THUMBDIR_CACHE_MAX = 4096
+
+# collect thumbnail count, size and index header of a thumbnail directory
+def scan_thumbdir(de):
+    d = de.path
+    key = (os.path.dirname(d), de.name)
+    # the index is rewritten in place on rebuild, and directory mtimes
+    # can be coarse, so check the index file itself too
+    try:
+        st = os.stat(os.path.join(d, _FFPREVIEW_IDX))
+        stamp = (de.stat().st_mtime_ns, st.st_mtime_ns, st.st_size)
+    except OSError:
+        stamp = (de.stat().st_mtime_ns, None, None)
+    cached = _thumbdir_cache.get(key)
+    if cached and cached[0] == stamp:
+        entry = cached[1]
+    else:
+        entry = { 'tdir': de.name, 'idx': None, 'vfile': '', 'size': 0 }
+        # one pass over the directory finds both thumbnails and index
+        sz = cnt = 0
+        has_idx = False
+        with os.scandir(d) as it:
+            for f in it:
+                if is_thumb_name(f.name):
+                    cnt += 1
+                    try:
+                        sz += f.stat().st_size
+                    except OSError:
+                        pass
+                elif f.name == _FFPREVIEW_IDX:
+                    has_idx = f.is_file()
+        if has_idx:
+            try:
+                # header only; old style indexes still decode in full,
+                # drop their thumbnail list right away
+                idx = read_idxfile(d, header_only=True)
+            except Exception as e:
+                eprint(1, os.path.join(d, _FFPREVIEW_IDX), str(e))
+            else:
+                idx['th'] = None
+                entry['idx'] = idx
+        entry['size'] = sz
+        if not entry['idx']:
+            entry['idx'] = { 'count': cnt, 'date': int(de.stat().st_mtime) }
+        _thumbdir_cache[key] = (stamp, entry)
+    # the video file may have been moved since, always check
+    idx = entry['idx']
+    entry['vfile'] = ''
+    if 'name' in idx and 'path' in idx:
+        opath = os.path.join(idx['path'], idx['name'])
+        if os.path.isfile(opath):
+            entry['vfile'] = opath
+    return entry
+
 # get list of all index files for thumbnail manager
 def get_indexfiles(path, prog_cb=None):
     flist = []
-    dlist = os.listdir(path)
+    # directory entries come with file type and cached stat info
+    with os.scandir(path) as it:
+        dlist = [e for e in it if e.is_dir()]
+    # results come back in input order, so sort the lightweight entries
+    dlist.sort(key=attrgetter('name'))
     dlen = len(dlist)
-    dcnt = 0
-    for sd in dlist:
-        if prog_cb and not dcnt % 20:
-            prog_cb(dcnt, dlen)
-        dcnt += 1
-        d = os.path.join(path, sd)
-        if not os.path.isdir(d):
-            continue
-        entry = { 'tdir': sd, 'idx': None, 'vfile': '', 'size': 0 }
-        fidx = os.path.join(d, _FFPREVIEW_IDX)
-        if os.path.isfile(fidx):
-            with open(fidx, 'r') as idxfile:
-                try:
-                    idx = json.load(idxfile)
-                except Exception as e:
-                    eprint(1, fidx, str(e))
-                    idx = {}
-                else:
-                    idx['th'] = None
-                    entry['idx'] = idx.copy()
-                    if 'name' in idx and 'path' in idx:
-                        opath = os.path.join(idx['path'], idx['name'])
-                        if os.path.isfile(opath):
-                            entry['vfile'] = opath
-        sz = cnt = 0
-        for f in os.listdir(d):
-            if re.match(r'^\d{8}\.png$', f):
-                cnt += 1
-                try:
-                    sz += os.path.getsize(os.path.join(d, f))
-                except:
-                    pass
-        entry['size'] = sz
-        if not entry['idx']:
-            entry['idx'] = { 'count': cnt, 'date': int(os.path.getmtime(d)) }
-        flist.append(entry)
-    flist = sorted(flist, key=lambda k: k['tdir'])
+    # scanning is dominated by syscall latency, so overlap it
+    nthreads = min(32, (os.cpu_count() or 1) * 4)
+    with ThreadPoolExecutor(max_workers=nthreads) as ex:
+        for entry in ex.map(scan_thumbdir, dlist):
+            if prog_cb and not len(flist) & 31:
+                prog_cb(len(flist), dlen)
+            flist.append(entry)
+    # forget about directories that are gone
+    parent = os.path.dirname(os.path.join(path, ''))
+    live = set(de.name for de in dlist)
+    for k in [k for k in _thumbdir_cache if k[0] == parent and k[1] not in live]:
+        del _thumbdir_cache[k]
+    # drop the oldest entries beyond the size limit
+    for k in list(_thumbdir_cache)[:len(_thumbdir_cache) - _THUMBDIR_CACHE_MAX]:
+        del _thumbdir_cache[k]
     if cfg['verbosity'] > 3:
         eprint(4, json.dumps(flist, indent=2))
     return flist
@@ -2329,7 +3047,7 @@ def main():
     proc = None
     cfg = ffConfig().get()
     if cfg['verbosity'] > 2:
-        eprint(3, 'cfg = ' + json.dumps(cfg, indent=2))
+        eprint(3, 'cfg = ' + json.dumps(cfg, indent=2, default=sorted))
 
     signal.signal(signal.SIGINT, sig_handler)
     signal.signal(signal.SIGTERM, sig_handler)
@@ -2344,54 +3062,58 @@ def main():
 
     # run in console batch mode, if requested
     if cfg['batch']:
-        errcnt = 0
-        for fn in cfg['vid']:
-            if not batch_process(fn):
-                errcnt += 1
-        die(errcnt)
+        fnames = []
+        for vid in cfg['vid']:
+            if os.path.isdir(vid):
+                fnames.extend(sorted(iter_videos(vid, cfg['vformats_set'])))
+            else:
+                fnames.append(vid)
+        # process files in parallel, leaving some headroom as ffmpeg
+        # is multi-threaded itself for many decoders
+        nworkers = min(len(fnames), max(1, (os.cpu_count() or 1) // 2))
+        if nworkers > 1:
+            with ProcessPoolExecutor(max_workers=nworkers, initializer=batch_init,
+                                     initargs=(cfg,)) as ex:
+                res = list(ex.map(batch_worker, fnames))
+        else:
+            res = [batch_process(fn) for fn in fnames]
+        die(res.count(False))
 
     # set up window
     if not _FF_DEBUG:
         os.environ['QT_LOGGING_RULES'] = 'qt5ct.debug=false'
     app = QApplication(sys.argv)
     app.setApplicationName(_FFPREVIEW_NAME)
+    # allow for keeping thumbnails of a few previously viewed files
+    QPixmapCache.setCacheLimit(256 * 1024)
     root = sMainWindow(title=_FFPREVIEW_NAME + ' ' + _FFPREVIEW_VERSION)
 
-    # start console debugging thread, if _FF_DEBUG is set
+    # periodically print console debugging info, if _FF_DEBUG is set
     if _FF_DEBUG:
-        import threading, resource, gc
-        global _ffdbg_thread, _ffdbg_run
-        gc.set_debug(gc.DEBUG_SAVEALL)
-
-        class _dbgProxy(QObject):
-            notify = pyqtSignal(dict)
-            def __init__(self, *args, receptor=None, **kwargs):
-                super().__init__(*args, **kwargs)
-                self.notify.connect(receptor)
-            def ping(self):
-                self.notify.emit({'type': '_dbg_count'})
-
-        def _ffdbg_update(*args):
-            tstart = time.time()
-            dbg_proxy = _dbgProxy(receptor=root.notify_receive)
-            def p(*args):
-                print(*args, file=sys.stderr)
-            while _ffdbg_run:
+        import resource, gc
+        global _ffdbg_exit
+        # keeping all garbage around is costly, only do it on request
+        saveall = str2bool(os.environ.get('FFDEBUG_SAVEALL'))
+        if saveall:
+            gc.set_debug(gc.DEBUG_SAVEALL)
+        tstart = time.time()
+        def p(*args):
+            print(*args, file=sys.stderr)
+        def _ffdbg_update():
+            root.notify_receive({'type': '_dbg_count'})
+            p('----- %.3f -----' % (time.time()-tstart))
+            p('max rss:', resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, 'KiB')
+            p('tLabel :', root._dbg_num_tlabels)
+            p('QObject:', root._dbg_num_qobjects)
+            p('gc cnt :', gc.get_count())
+            if saveall:
                 gc.collect()
-                time.sleep(0.5)
-                dbg_proxy.ping()
-                time.sleep(0.5)
-                p('----- %.3f -----' % (time.time()-tstart))
-                p('max rss:', resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, 'KiB')
-                p('tLabel :', args[0]._dbg_num_tlabels)
-                p('QObject:', args[0]._dbg_num_qobjects)
-                p('gc cnt :', gc.get_count())
+                p('garbage:', len(gc.garbage))
+        def _ffdbg_exit():
             p('gc gen0:', gc.get_stats()[0])
             p('gc gen1:', gc.get_stats()[1])
             p('gc gen2:', gc.get_stats()[2])
-        _ffdbg_thread = threading.Thread(target=_ffdbg_update, args=(root,))
-        _ffdbg_run = True
-        _ffdbg_thread.start()
+        QTimer(root, timeout=_ffdbg_update).start(1000)
 
     # start in selected mode of operation, run main loop
     root.show()